@@ -56,6 +56,8 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.text import Text
 from matplotlib.widgets import SpanSelector
 import warnings
 import re
@@ -146,6 +148,39 @@ QUALITY_COLORS = {
     2: '#f44336'   # Red for Error Type 2
 }
 
+# Rep list filters that select a single quality code
+FILTER_QUALITY_CODES = {
+    'Clean': 0,
+    'Type 1 Error': 1,
+    'Type 2 Error': 2
+}
+
+# Quality stored in the rep stats array for reps marked for complete removal
+DELETED_QUALITY = -1
+
+# Per-rep fields the rep list and full-dataset view filter on (one row per rep, in display order)
+REP_STATS_DTYPE = np.dtype([
+    ('session', np.int32),        # Index into the sorted session keys
+    ('quality', np.int16),        # Effective quality code, DELETED_QUALITY once removed
+    ('changed', np.bool_),        # Has a pending label/metadata change
+    ('has_deletions', np.bool_),  # Has pending partial deletions
+    ('start', np.int64),          # Rep rows are self._row_order[start:stop]
+    ('stop', np.int64),
+])
+
+# Largest number of quality codes any exercise uses (sizes the reusable label/button pools)
+MAX_QUALITY_CODES = len(QUALITY_COLORS)
+
+# QUALITY_COLORS as an array indexed by quality code (last entry is the fallback color)
+QUALITY_COLOR_ARRAY = np.array([QUALITY_COLORS.get(code, '#333') for code in range(MAX_QUALITY_CODES)] + ['#333'],
+                               dtype=object)
+
+# Small integer code columns, downcast on load
+CODE_COLUMNS = ['quality_code', 'target', 'equipment_code', 'exercise_code', 'rep', 'participant']
+
+# Repetitive string columns, parsed straight into category dtype on load
+CATEGORY_COLUMNS = {'source_file': 'category'}
+
 # Signal columns for visualization
 SIGNAL_COLUMNS = {
     'Filtered Magnitude': 'filteredMag',
@@ -161,6 +196,13 @@ SIGNAL_COLUMNS = {
     'Gyro Z': 'gyroZ',
 }
 
+# Upper bound on points drawn per trace (a few times the plot width in pixels)
+MAX_PLOT_POINTS = 4000
+
+# Buffer size and rows per chunk used when writing the relabeled CSV
+CSV_WRITE_BUFFER = 1 << 20
+CSV_WRITE_CHUNKSIZE = 100_000
+
 
 # =============================================================================
 # HELPER FUNCTIONS
@@ -260,6 +302,50 @@ def get_quality_column_name(df):
     return None
 
 
+def downcast_code_columns(df):
+    """
+    Downcast the integer code columns (quality, equipment, exercise, rep, participant)
+    to the smallest integer dtype that holds them. Columns with missing values are
+    read as floats by pandas and are left untouched.
+    """
+    for col in CODE_COLUMNS:
+        if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def write_csv(df, path):
+    """
+    Write df to path without the index, through a 1 MiB buffered handle in row chunks.
+    """
+    with open(path, 'w', newline='', buffering=CSV_WRITE_BUFFER) as f:
+        df.to_csv(f, index=False, chunksize=CSV_WRITE_CHUNKSIZE)
+
+
+def downsample_for_plot(x, y, max_points=MAX_PLOT_POINTS):
+    """
+    Decimate (x, y) to at most about max_points samples for drawing by keeping the
+    minimum and maximum of each bucket, so spikes survive. The first and last samples
+    are always kept so the trace still spans the whole data.
+    """
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    bucket = -(-n // max(max_points // 2, 1))
+    n_buckets = -(-n // bucket)
+    padded = np.concatenate([y, np.repeat(y[-1:], n_buckets * bucket - n)]).reshape(n_buckets, bucket)
+    offsets = np.arange(n_buckets) * bucket
+    idx = np.concatenate([offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1), [0, n - 1]])
+    idx = np.unique(np.minimum(idx, n - 1))
+    return x[idx], y[idx]
+
+
+def quality_lookup_index(qualities):
+    """Map quality codes to rows of the per-code lookup arrays (unknown codes -> fallback row)"""
+    qualities = np.asarray(qualities)
+    return np.where((qualities >= 0) & (qualities < MAX_QUALITY_CODES), qualities, MAX_QUALITY_CODES)
+
+
 def get_quality_value(df_or_series, default=0):
     """
     Get quality value from a dataframe or series, checking both 'quality_code' and 'target' columns.
@@ -277,6 +363,17 @@ def get_quality_value(df_or_series, default=0):
     return default
 
 
+class FastStyleCanvas(FigureCanvasTkAgg):
+    """
+    Tk canvas that renders under Matplotlib's 'fast' style (simplified line paths and
+    chunked Agg rendering) so long sensor traces stay responsive, without changing the
+    global rcParams
+    """
+    def draw(self):
+        with plt.style.context('fast'):
+            super().draw()
+
+
 # =============================================================================
 # MAIN APPLICATION CLASS
 # =============================================================================
@@ -290,7 +387,8 @@ class RepLabelerApp:
         
         # Data storage
         self.df = None
-        self.original_df = None
+        self._edit_journal = []  # (column, row positions, old values) for in-place edits since load/save
+        self._quality_col = None  # 'quality_code' or 'target', looked up once per parse
         self.current_file = None
         self.reps_data = {}
         self.sessions_data = {}  # Track sessions for hierarchical display
@@ -298,6 +396,16 @@ class RepLabelerApp:
         self.selected_session = None  # Currently selected session filter
         self.changes_made = {}
         self.deleted_ranges = {}  # Track deleted ranges per rep
+        self._row_order = None  # Row positions sorted by participant/session/rep
+        self._col_arrays = {}  # Column name -> numpy array in _row_order
+        self._rep_stats = np.zeros(0, dtype=REP_STATS_DTYPE)  # Filterable per-rep fields
+        self._rep_positions = {}  # rep_id -> row in _rep_stats
+        self._session_ids = {}  # Session key -> value of the 'session' field
+        self._quality_counts = {}  # Effective quality code -> number of reps
+        self._session_quality_counts = {}  # Session key -> {quality code: number of reps}
+        self._session_labels = ("All Sessions",)  # Session selector values, built per parse
+        self._session_display_index = {}  # Session selector text -> session key
+        self._reps_sorted_keys = ()  # All rep_ids in display (sorted) order
         
         # Auto-detected info
         self.equipment_code = None
@@ -312,9 +420,23 @@ class RepLabelerApp:
         self.selection_start = None
         self.selection_end = None
         self.span_selector = None
+        self._plot_background = None  # Axes pixels without any selection, for blitting
         
         # Rep boundaries for full dataset view click detection
         self.rep_boundaries = []
+        self._boundary_starts = np.zeros(0)  # Boundary starts/ends in display order
+        self._boundary_ends = np.zeros(0)
+        self._boundary_order = np.zeros(0, dtype=np.intp)  # Boundary indices sorted by start
+        self._rep_label_pool = []  # Reusable rep label Text artists for the full dataset view
+        
+        # Rep shown on each rep listbox row, and the reverse lookup
+        self._listbox_rep_ids = []
+        self._listbox_rows = {}
+        self._listbox_texts = []  # Text and color currently shown on each row
+        self._listbox_colors = []
+        
+        # Pending root.after() ids for debounced UI callbacks
+        self._pending_callbacks = {}
         
         self.setup_ui()
         
@@ -373,6 +495,11 @@ class RepLabelerApp:
         self.labels_container = tk.Frame(self.labels_frame, bg='#f5f5f5')
         self.labels_container.pack(fill=tk.X, padx=10, pady=5)
         
+        # Labels are created once and reconfigured when the exercise changes
+        self._quality_label_pool = [
+            tk.Label(self.labels_container, font=('Arial', 11, 'bold'), bg='#f5f5f5')
+            for _ in range(MAX_QUALITY_CODES)
+        ]
         self.update_quality_labels_display()
         
         # =====================================================================
@@ -401,7 +528,8 @@ class RepLabelerApp:
         self.session_combo = ttk.Combobox(session_frame, textvariable=self.session_var,
                                          values=["All Sessions"], state='readonly', width=30)
         self.session_combo.pack(side=tk.LEFT, padx=5)
-        self.session_combo.bind('<<ComboboxSelected>>', self.on_session_select)
+        self.session_combo.bind('<<ComboboxSelected>>',
+                                lambda e: self._debounce(self.on_session_select))
         
         # Filter controls
         filter_frame = tk.Frame(rep_header, bg='#f5f5f5')
@@ -414,7 +542,8 @@ class RepLabelerApp:
         self.filter_combo = ttk.Combobox(filter_frame, textvariable=self.filter_var,
                                         values=filter_options, state='readonly', width=14)
         self.filter_combo.pack(side=tk.LEFT, padx=5)
-        self.filter_combo.bind('<<ComboboxSelected>>', self.apply_filter)
+        self.filter_combo.bind('<<ComboboxSelected>>',
+                               lambda e: self._debounce(self.apply_filter))
         
         # Summary label
         self.summary_var = tk.StringVar(value="")
@@ -460,7 +589,7 @@ class RepLabelerApp:
         for mode in view_modes:
             rb = tk.Radiobutton(view_signal_frame, text=mode, variable=self.view_mode_var,
                                value=mode, bg='#f5f5f5', font=('Arial', 9),
-                               command=self.toggle_view_mode)
+                               command=lambda: self._debounce(self.toggle_view_mode))
             rb.pack(side=tk.LEFT, padx=3)
         
         ttk.Separator(view_signal_frame, orient='vertical').pack(side=tk.LEFT, fill=tk.Y, padx=10)
@@ -475,19 +604,21 @@ class RepLabelerApp:
             self.signal_vars[col_name] = var
             cb = tk.Checkbutton(view_signal_frame, text=display_name, variable=var,
                                bg='#f5f5f5', font=('Arial', 8),
-                               command=self.update_signal_selection)
+                               command=lambda: self._debounce(self.update_signal_selection))
             cb.pack(side=tk.LEFT, padx=3)
         
         # Matplotlib figure
         self.fig = Figure(figsize=(10, 4), dpi=100)
         self.ax = self.fig.add_subplot(111)
         
-        self.canvas = FigureCanvasTkAgg(self.fig, master=viz_frame)
+        self.canvas = FastStyleCanvas(self.fig, master=viz_frame)
         self.canvas.draw()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Connect click event for full dataset view
         self.canvas.mpl_connect('button_press_event', self.on_canvas_click)
+        # Re-capture the clean plot after every full draw (this also covers window resizes)
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
         
         # Toolbar frame with delete button
         toolbar_container = tk.Frame(viz_frame, bg='#f5f5f5')
@@ -566,6 +697,12 @@ class RepLabelerApp:
         self.quality_btn_frame = tk.Frame(buttons_frame, bg='#fff3cd')
         self.quality_btn_frame.pack(side=tk.LEFT)
         
+        # Buttons are created once and reconfigured when the exercise changes
+        self._quality_btn_pool = [
+            tk.Button(self.quality_btn_frame, font=('Arial', 11, 'bold'), fg='white',
+                     padx=20, pady=10, cursor='hand2', relief=tk.RAISED, borderwidth=3)
+            for _ in range(MAX_QUALITY_CODES)
+        ]
         self.quality_buttons = {}
         self.create_quality_buttons()
         
@@ -603,6 +740,27 @@ class RepLabelerApp:
                                 font=('Arial', 10, 'italic'), bg='#f5f5f5', fg='#666')
         changes_label.pack(pady=5)
     
+    def _debounce(self, fn, ms=80):
+        """Coalesce bursts of UI events into a single call of fn once input settles"""
+        pending = self._pending_callbacks.pop(fn.__name__, None)
+        if pending is not None:
+            self.root.after_cancel(pending)
+        
+        def run():
+            self._pending_callbacks.pop(fn.__name__, None)
+            fn()
+        
+        self._pending_callbacks[fn.__name__] = self.root.after(ms, run)
+    
+    def _schedule_full_redraw(self):
+        """Redraw the full dataset view once a burst of edits settles"""
+        self._debounce(self._refresh_full_dataset, ms=150)
+    
+    def _refresh_full_dataset(self):
+        """Debounced full dataset redraw, dropped if another view was opened meanwhile"""
+        if self.view_mode_var.get() == "Full Dataset":
+            self.visualize_full_dataset()
+    
     def on_equipment_change_selected(self, event=None):
         """Update exercise dropdown based on selected equipment"""
         equipment_str = self.equipment_change_var.get()
@@ -646,12 +804,7 @@ class RepLabelerApp:
         new_exercise = int(exercise_str.split(":")[0])
         
         # Extract rep IDs
-        selected_rep_ids = []
-        for idx in selections:
-            display_text = self.rep_listbox.get(idx)
-            rep_id = display_text.split(" | ")[0].strip()
-            if rep_id in self.reps_data:
-                selected_rep_ids.append(rep_id)
+        selected_rep_ids = self._selected_rep_ids(selections)
         
         if not selected_rep_ids:
             messagebox.showwarning("No Valid Selection", "No valid reps selected")
@@ -677,8 +830,8 @@ class RepLabelerApp:
             rep_num = rep_info['rep']
             
             mask = (self.df['participant'] == participant) & (self.df['rep'] == rep_num)
-            self.df.loc[mask, 'equipment_code'] = new_equipment
-            self.df.loc[mask, 'exercise_code'] = new_exercise
+            self._journaled_write(mask, 'equipment_code', new_equipment)
+            self._journaled_write(mask, 'exercise_code', new_exercise)
             
             # Update in reps_data
             rep_info['equipment_code'] = new_equipment
@@ -686,7 +839,7 @@ class RepLabelerApp:
             
             # Mark as changed (if not already marked for label change)
             if rep_id not in self.changes_made:
-                self.changes_made[rep_id] = rep_info['quality_code']  # Mark changed
+                self._set_rep_quality(rep_id, rep_info['quality_code'])  # Mark changed
         
         # Update UI
         self.update_changes_counter()
@@ -696,7 +849,8 @@ class RepLabelerApp:
             self.visualize_rep(selected_rep_ids[0])
             self.update_rep_info(selected_rep_ids[0])
         else:
-            self.visualize_full_dataset()
+            self.view_mode_var.set("Full Dataset")
+            self._schedule_full_redraw()
             self.update_multi_rep_info(selected_rep_ids)
         
         messagebox.showinfo("Success", 
@@ -706,31 +860,29 @@ class RepLabelerApp:
 
     def update_quality_labels_display(self):
         """Update the quality labels legend display based on current exercise"""
-        # Clear existing labels
-        for widget in self.labels_container.winfo_children():
-            widget.destroy()
+        # Hide the pooled labels, then re-pack the ones the current exercise uses
+        for lbl in self._quality_label_pool:
+            lbl.pack_forget()
         
-        # Add labels for current exercise
-        for code, label in self.current_quality_labels.items():
-            color = QUALITY_COLORS[code]
-            lbl = tk.Label(self.labels_container, text=f"● {code}: {label}",
-                          font=('Arial', 11, 'bold'), bg='#f5f5f5', fg=color)
+        for lbl, (code, label) in zip(self._quality_label_pool, self.current_quality_labels.items()):
+            lbl.configure(text=f"● {code}: {label}", fg=QUALITY_COLORS[code])
             lbl.pack(side=tk.LEFT, padx=15, pady=5)
+        
+        # Labels indexed by quality code for the rep list (None marks unknown codes)
+        self._quality_label_array = np.array(
+            [self.current_quality_labels.get(code) for code in range(MAX_QUALITY_CODES)] + [None], dtype=object)
     
     def create_quality_buttons(self):
-        """Create/update quality selection buttons based on current exercise"""
-        # Clear existing buttons
-        for widget in self.quality_btn_frame.winfo_children():
-            widget.destroy()
+        """Update the pooled quality selection buttons based on current exercise"""
+        # Hide the pooled buttons, then re-pack the ones the current exercise uses
+        for btn in self._quality_btn_pool:
+            btn.pack_forget()
         
         self.quality_buttons = {}
         
-        for code, label in self.current_quality_labels.items():
+        for btn, (code, label) in zip(self._quality_btn_pool, self.current_quality_labels.items()):
             color = QUALITY_COLORS[code]
-            btn = tk.Button(self.quality_btn_frame, text=f"{code}: {label}",
-                          font=('Arial', 11, 'bold'), bg=color, fg='white',
-                          padx=20, pady=10, cursor='hand2', relief=tk.RAISED,
-                          borderwidth=3, activebackground=color,
+            btn.configure(text=f"{code}: {label}", bg=color, activebackground=color,
                           command=lambda c=code: self.change_label(c))
             btn.pack(side=tk.LEFT, padx=8, pady=5)
             self.quality_buttons[code] = btn
@@ -747,8 +899,8 @@ class RepLabelerApp:
             return
         
         try:
-            self.df = pd.read_csv(file_path)
-            self.original_df = self.df.copy()
+            self.df = downcast_code_columns(pd.read_csv(file_path, dtype=CATEGORY_COLUMNS))
+            self._edit_journal = []
             self.current_file = file_path
             self.changes_made = {}
             self.deleted_ranges = {}
@@ -810,13 +962,21 @@ class RepLabelerApp:
         self.detection_var.set(info_text)
     
     def parse_reps(self):
-        """Parse the dataframe into individual reps, grouped by participant and session/set"""
+        """Parse the dataframe into individual reps, grouped by participant and session/set
+        
+        Rows are sorted by the grouping columns once and each rep is stored as a
+        (start, stop) range into the cached column arrays instead of a DataFrame slice.
+        """
         self.reps_data = {}
         self.sessions_data = {}  # Track sessions for hierarchical display
+        self._row_order = None
+        self._col_arrays = {}
         
         if self.df is None:
             return
         
+        self._quality_col = get_quality_column_name(self.df)
+        
         # Determine grouping columns
         has_participant = 'participant' in self.df.columns
         has_source_file = 'source_file' in self.df.columns
@@ -824,151 +984,282 @@ class RepLabelerApp:
         
         if not has_rep:
             # Treat entire file as one rep
-            quality = get_quality_value(self.df, default=0)
+            self._cache_columns(np.arange(len(self.df)))
+            first_row = self.df.iloc[0]
             self.reps_data['S1_R1'] = {
-                'data': self.df.copy(),
                 'participant': 1,
                 'session': 'Set_1',
                 'session_idx': 1,
+                'session_key': 'S1',
                 'rep': 1,
-                'quality_code': quality,
-                'equipment_code': self.df['equipment_code'].iloc[0] if 'equipment_code' in self.df.columns else self.equipment_code,
-                'exercise_code': self.df['exercise_code'].iloc[0] if 'exercise_code' in self.df.columns else self.exercise_code,
-                'indices': self.df.index.tolist()
+                'quality_code': get_quality_value(first_row, default=0),
+                'equipment_code': first_row['equipment_code'] if 'equipment_code' in self.df.columns else self.equipment_code,
+                'exercise_code': first_row['exercise_code'] if 'exercise_code' in self.df.columns else self.exercise_code,
+                'start': 0,
+                'stop': len(self.df)
             }
             self.sessions_data['S1'] = {'participant': 1, 'session': 'Set_1', 'reps': ['S1_R1']}
-            return
         
-        # Build grouping structure: participant -> source_file (session) -> rep
-        if has_participant and has_source_file:
-            # Full structure: participant + source_file + rep
+        else:
+            # Build grouping structure: participant -> source_file (session) -> rep
+            if has_participant and has_source_file:
+                group_cols = ['participant', 'source_file', 'rep']
+            elif has_participant:
+                group_cols = ['participant', 'rep']
+            else:
+                group_cols = ['rep']
+            
+            order, starts, stops = self._sort_into_runs(group_cols)
+            participants = self._first_values('participant', order[starts], 1)
+            
+            # Drop runs without a participant up front and convert the integer keys
+            # in one pass, so the build loop only sees valid reps
+            valid = ~pd.isna(participants)
+            starts, stops = starts[valid], stops[valid]
+            first_rows = order[starts]
+            participants = participants[valid].astype(int).tolist()
+            source_files = self._first_values('source_file', first_rows, None) if has_participant else [None] * len(first_rows)
+            rep_nums = self.df['rep'].to_numpy()[first_rows].astype(int).tolist()
+            equipment_codes = self._first_values('equipment_code', first_rows, self.equipment_code)
+            exercise_codes = self._first_values('exercise_code', first_rows, self.exercise_code)
+            quality_codes = self._first_quality_codes(first_rows)
             session_idx = 0
-            
-            for participant_id in sorted(self.df['participant'].dropna().unique()):
-                p_data = self.df[self.df['participant'] == participant_id]
-                sessions = sorted(p_data['source_file'].unique())
-                
-                for source_file in sessions:
-                    session_idx += 1
-                    session_data = p_data[p_data['source_file'] == source_file]
+            current_session = None
+            
+            for start, stop, participant_id, source_file, rep_num, quality_code, equipment_code, exercise_code in zip(
+                    starts.tolist(), stops.tolist(), participants, source_files, rep_nums,
+                    quality_codes, equipment_codes, exercise_codes):
+                # Runs are sorted, so a new session starts whenever participant/source_file change
+                if (participant_id, source_file) != current_session:
+                    current_session = (participant_id, source_file)
                     
-                    # Extract session name from filename
-                    session_name = Path(source_file).stem if source_file else f"Set_{session_idx}"
-                    session_key = f"P{int(participant_id)}_S{session_idx}"
+                    if 'source_file' in group_cols:
+                        # Extract session name from filename
+                        session_idx += 1
+                        session_name = Path(source_file).stem if source_file else f"Set_{session_idx}"
+                        session_key = f"P{participant_id}_S{session_idx}"
+                    else:
+                        session_idx = 1
+                        session_name = 'Default'
+                        session_key = f"P{participant_id}_S1" if has_participant else "S1"
                     
                     self.sessions_data[session_key] = {
-                        'participant': int(participant_id),
+                        'participant': participant_id,
                         'session': session_name,
                         'session_idx': session_idx,
-                        'source_file': source_file,
                         'reps': []
                     }
-                    
-                    # Get reps within this session
-                    for rep_num in sorted(session_data['rep'].unique()):
-                        rep_data = session_data[session_data['rep'] == rep_num]
-                        rep_id = f"P{int(participant_id)}_S{session_idx}_R{int(rep_num)}"
-                        
-                        quality = get_quality_value(rep_data, default=0)
-                        
-                        self.reps_data[rep_id] = {
-                            'data': rep_data.copy(),
-                            'participant': int(participant_id),
-                            'session': session_name,
-                            'session_key': session_key,
-                            'session_idx': session_idx,
-                            'source_file': source_file,
-                            'rep': int(rep_num),
-                            'quality_code': quality,
-                            'equipment_code': rep_data['equipment_code'].iloc[0] if 'equipment_code' in rep_data.columns else self.equipment_code,
-                            'exercise_code': rep_data['exercise_code'].iloc[0] if 'exercise_code' in rep_data.columns else self.exercise_code,
-                            'indices': rep_data.index.tolist()
-                        }
-                        
-                        self.sessions_data[session_key]['reps'].append(rep_id)
-        
-        elif has_participant:
-            # Only participant + rep (no source_file)
-            for participant_id in sorted(self.df['participant'].dropna().unique()):
-                p_data = self.df[self.df['participant'] == participant_id]
-                session_key = f"P{int(participant_id)}_S1"
+                    if 'source_file' in group_cols:
+                        self.sessions_data[session_key]['source_file'] = source_file
                 
-                self.sessions_data[session_key] = {
-                    'participant': int(participant_id),
-                    'session': 'Default',
-                    'session_idx': 1,
-                    'reps': []
-                }
-                
-                for rep_num in sorted(p_data['rep'].unique()):
-                    rep_data = p_data[p_data['rep'] == rep_num]
-                    rep_id = f"P{int(participant_id)}_S1_R{int(rep_num)}"
-                    
-                    quality = get_quality_value(rep_data, default=0)
-                    
-                    self.reps_data[rep_id] = {
-                        'data': rep_data.copy(),
-                        'participant': int(participant_id),
-                        'session': 'Default',
-                        'session_key': session_key,
-                        'session_idx': 1,
-                        'rep': int(rep_num),
-                        'quality_code': quality,
-                        'equipment_code': rep_data['equipment_code'].iloc[0] if 'equipment_code' in rep_data.columns else self.equipment_code,
-                        'exercise_code': rep_data['exercise_code'].iloc[0] if 'exercise_code' in rep_data.columns else self.exercise_code,
-                        'indices': rep_data.index.tolist()
-                    }
-                    
-                    self.sessions_data[session_key]['reps'].append(rep_id)
-        
-        else:
-            # Only rep column - no participant grouping
-            session_key = "S1"
-            self.sessions_data[session_key] = {
-                'participant': 1,
-                'session': 'Default',
-                'session_idx': 1,
-                'reps': []
-            }
-            
-            for rep_num in sorted(self.df['rep'].unique()):
-                rep_data = self.df[self.df['rep'] == rep_num]
-                rep_id = f"S1_R{int(rep_num)}"
-                
-                quality = get_quality_value(rep_data, default=0)
+                rep_id = f"{session_key}_R{rep_num}"
                 
                 self.reps_data[rep_id] = {
-                    'data': rep_data.copy(),
-                    'participant': 1,
-                    'session': 'Default',
+                    'participant': participant_id,
+                    'session': session_name,
                     'session_key': session_key,
-                    'session_idx': 1,
-                    'rep': int(rep_num),
-                    'quality_code': quality,
-                    'equipment_code': rep_data['equipment_code'].iloc[0] if 'equipment_code' in rep_data.columns else self.equipment_code,
-                    'exercise_code': rep_data['exercise_code'].iloc[0] if 'exercise_code' in rep_data.columns else self.exercise_code,
-                    'indices': rep_data.index.tolist()
+                    'session_idx': session_idx,
+                    'rep': rep_num,
+                    'quality_code': quality_code,
+                    'equipment_code': equipment_code,
+                    'exercise_code': exercise_code,
+                    'start': start,
+                    'stop': stop
                 }
+                if 'source_file' in group_cols:
+                    self.reps_data[rep_id]['source_file'] = source_file
                 
                 self.sessions_data[session_key]['reps'].append(rep_id)
+        
+        self._mark_sorted_timestamps()
+        
+        # Session selector values and sorted rep id lists only change on a re-parse
+        self._session_display_index = {
+            self._session_display_text(session_info): session_key
+            for session_key, session_info in sorted(self.sessions_data.items())
+        }
+        self._session_labels = ("All Sessions",) + tuple(self._session_display_index)
+        self._session_ids = {session_key: i for i, session_key in enumerate(sorted(self.sessions_data))}
+        self._reps_sorted_keys = tuple(sorted(self.reps_data))
+        self._rep_positions = {rep_id: i for i, rep_id in enumerate(self._reps_sorted_keys)}
+        
+        # Filter fields and quality counts for the rep list (pending changes are always
+        # cleared around a re-parse, so the stored quality is the effective one).
+        # From here on they are only updated incrementally through _set_rep_quality.
+        self._rep_stats = np.zeros(len(self._reps_sorted_keys), dtype=REP_STATS_DTYPE)
+        self._quality_counts = {}
+        self._session_quality_counts = {}
+        for pos, rep_id in enumerate(self._reps_sorted_keys):
+            rep_info = self.reps_data[rep_id]
+            quality = rep_info['quality_code']
+            self._rep_stats['session'][pos] = self._session_ids[rep_info['session_key']]
+            self._rep_stats['quality'][pos] = quality
+            self._rep_stats['start'][pos] = rep_info['start']
+            self._rep_stats['stop'][pos] = rep_info['stop']
+            self._quality_counts[quality] = self._quality_counts.get(quality, 0) + 1
+            session_counts = self._session_quality_counts.setdefault(rep_info['session_key'], {})
+            session_counts[quality] = session_counts.get(quality, 0) + 1
     
-    def update_session_selector(self):
-        """Update the session selector combo box with available sessions"""
-        session_options = ["All Sessions"]
+    def _session_display_text(self, session_info):
+        """Format a session for the selector, e.g. P001 | session_name (X reps)"""
+        participant = session_info.get('participant', 1)
+        session_name = session_info.get('session', 'Unknown')
+        reps_count = len(session_info.get('reps', []))
         
-        for session_key, session_info in sorted(self.sessions_data.items()):
-            participant = session_info.get('participant', 1)
-            session_name = session_info.get('session', 'Unknown')
-            reps_count = len(session_info.get('reps', []))
-            
-            # Truncate session name if too long
-            if len(session_name) > 25:
-                session_name = session_name[:22] + "..."
-            
-            display_text = f"P{participant:03d} | {session_name} ({reps_count} reps)"
-            session_options.append(display_text)
+        # Truncate session name if too long
+        if len(session_name) > 25:
+            session_name = session_name[:22] + "..."
+        
+        return f"P{participant:03d} | {session_name} ({reps_count} reps)"
+    
+    def _set_rep_quality(self, rep_id, new_quality):
+        """Record a pending quality (or 'DELETED') for a rep and update the index and counts
+        
+        Passing None drops the pending change and reverts the rep to its original quality.
+        """
+        rep_info = self.reps_data[rep_id]
+        old_quality = self.changes_made.get(rep_id, rep_info['quality_code'])
+        
+        if new_quality is None:
+            self.changes_made.pop(rep_id, None)
+            new_quality = rep_info['quality_code']
+        else:
+            self.changes_made[rep_id] = new_quality
+        
+        pos = self._rep_positions[rep_id]
+        self._rep_stats['changed'][pos] = rep_id in self.changes_made
+        
+        if new_quality == old_quality:
+            return
+        
+        self._rep_stats['quality'][pos] = DELETED_QUALITY if new_quality == 'DELETED' else new_quality
+        session_counts = self._session_quality_counts.setdefault(rep_info['session_key'], {})
+        if old_quality != 'DELETED':
+            self._quality_counts[old_quality] -= 1
+            session_counts[old_quality] -= 1
+        if new_quality != 'DELETED':
+            self._quality_counts[new_quality] = self._quality_counts.get(new_quality, 0) + 1
+            session_counts[new_quality] = session_counts.get(new_quality, 0) + 1
+    
+    def _displayed_rep_ids(self, filter_type="All"):
+        """Rep ids left by the session selection and a rep list filter, in display order"""
+        return [self._reps_sorted_keys[pos] for pos in self._displayed_rep_positions(filter_type).tolist()]
+    
+    def _displayed_rep_positions(self, filter_type="All"):
+        """Rows of the rep stats array left by the session selection and a rep list filter
+        
+        The predicates run as boolean masks over the rep stats array, so only the
+        matching reps are ever visited in Python.
+        """
+        stats = self._rep_stats
+        keep = stats['quality'] != DELETED_QUALITY
+        if self.selected_session is not None:
+            keep &= stats['session'] == self._session_ids.get(self.selected_session, -1)
+        
+        if filter_type in FILTER_QUALITY_CODES:
+            keep &= stats['quality'] == FILTER_QUALITY_CODES[filter_type]
+        elif filter_type == "Changed":
+            keep &= stats['changed']
+        elif filter_type == "Has Deletions":
+            keep &= stats['has_deletions']
+        
+        return np.flatnonzero(keep)
+    
+    def _sort_into_runs(self, group_cols):
+        """Sort rows by group_cols once and return (order, starts, stops) of each contiguous group
+        
+        Every key column is factorized in a single pass and the integer codes are
+        lexsorted together, so grouping never falls back to per-value boolean masks.
+        """
+        codes = [pd.factorize(self.df[col], sort=True)[0] for col in group_cols]
+        order = np.lexsort(codes[::-1])  # lexsort treats the last key as primary
+        self._cache_columns(order)
+        
+        # A new run starts wherever any grouping key differs from the previous row
+        is_start = np.zeros(len(order), dtype=bool)
+        is_start[:1] = True
+        for col_codes in codes:
+            sorted_codes = col_codes[order]
+            is_start[1:] |= sorted_codes[1:] != sorted_codes[:-1]
+        
+        starts = np.flatnonzero(is_start)
+        stops = np.r_[starts[1:], len(order)]
+        return order, starts, stops
+    
+    def _first_values(self, col, positions, default):
+        """Read col at the given row positions in one vectorized call (default if col is missing)"""
+        if col not in self.df.columns:
+            return np.full(len(positions), default, dtype=object)
+        return self.df[col].to_numpy()[positions]
+    
+    def _first_quality_codes(self, positions):
+        """Quality code (quality_code or target column) at each row position as ints, 0 if missing"""
+        if self._quality_col is None:
+            return [0] * len(positions)
+        values = self.df[self._quality_col].to_numpy()[positions]
+        return np.where(pd.isna(values), 0, values).astype(int).tolist()
+    
+    def _cache_columns(self, order):
+        """Cache the timestamp/signal columns as numpy arrays in rep-sorted row order
+        
+        Exported CSVs are normally already grouped by rep; in that case the order is
+        the identity and the arrays are views onto the DataFrame instead of copies.
+        """
+        self._row_order = order
+        already_sorted = bool(np.all(order[1:] > order[:-1]))
+        columns = ['timestamp_ms'] + list(SIGNAL_COLUMNS.values())
+        self._col_arrays = {col: self.df[col].to_numpy() if already_sorted else self.df[col].to_numpy()[order]
+                            for col in columns if col in self.df.columns}
+    
+    def _rep_column(self, rep_id, col):
+        """Return a rep's values for a cached column as a view (no copy)"""
+        rep_info = self.reps_data[rep_id]
+        return self._col_arrays[col][rep_info['start']:rep_info['stop']]
+    
+    def _mark_sorted_timestamps(self):
+        """Flag each rep whose timestamps are non-decreasing (so ranges can be binary searched)"""
+        if 'timestamp_ms' not in self._col_arrays:
+            return
         
-        self.session_combo['values'] = session_options
+        ts = self._col_arrays['timestamp_ms']
+        # Positions i where ts[i+1] does not follow ts[i] in order (NaNs count as breaks)
+        breaks = np.flatnonzero(~(ts[1:] >= ts[:-1]))
+        starts = np.fromiter((info['start'] for info in self.reps_data.values()), dtype=np.int64)
+        stops = np.fromiter((info['stop'] for info in self.reps_data.values()), dtype=np.int64)
+        # A rep is sorted when no break lies in [start, stop - 1)
+        first_break = np.searchsorted(breaks, starts)
+        is_sorted = np.searchsorted(breaks, stops - 1) == first_break
+        for rep_info, rep_sorted in zip(self.reps_data.values(), is_sorted.tolist()):
+            rep_info['ts_sorted'] = rep_sorted
+    
+    def _time_range_bounds(self, rep_id, start_ms, end_ms):
+        """Return (lo, hi) such that rep samples lo:hi fall in [start_ms, end_ms], or None if unsorted"""
+        if not self.reps_data[rep_id].get('ts_sorted', False):
+            return None
+        rep_times = self._rep_column(rep_id, 'timestamp_ms')
+        lo = int(np.searchsorted(rep_times, start_ms, side='left'))
+        hi = int(np.searchsorted(rep_times, end_ms, side='right'))
+        return lo, max(hi, lo)
+    
+    def _rep_rows(self, rep_id):
+        """Return the row positions in self.df belonging to a rep"""
+        rep_info = self.reps_data[rep_id]
+        return self._row_order[rep_info['start']:rep_info['stop']]
+    
+    def _reps_rows(self, positions):
+        """Return the row positions in self.df of several reps (rep stats rows) and each rep's row count
+        
+        The start/stop columns of the rep stats array are expanded into one index
+        array, so a whole batch of reps is gathered without a Python loop.
+        """
+        starts = self._rep_stats['start'][positions]
+        counts = self._rep_stats['stop'][positions] - starts
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self._row_order[offsets + np.arange(offsets.size)], counts
+    
+    def update_session_selector(self):
+        """Update the session selector combo box with available sessions"""
+        self.session_combo['values'] = self._session_labels
         self.session_var.set("All Sessions")
         self.selected_session = None
     
@@ -976,26 +1267,13 @@ class RepLabelerApp:
         """Handle session selection from combo box"""
         selection = self.session_var.get()
         
-        if selection == "All Sessions":
-            self.selected_session = None
-        else:
-            # Extract session key from selection
-            # Format: "P001 | session_name (X reps)"
-            try:
-                # Find matching session
-                for session_key, session_info in self.sessions_data.items():
-                    participant = session_info.get('participant', 1)
-                    session_name = session_info.get('session', 'Unknown')
-                    if len(session_name) > 25:
-                        session_name = session_name[:22] + "..."
-                    reps_count = len(session_info.get('reps', []))
-                    
-                    expected_display = f"P{participant:03d} | {session_name} ({reps_count} reps)"
-                    if selection == expected_display:
-                        self.selected_session = session_key
-                        break
-            except:
-                self.selected_session = None
+        # "All Sessions" (or any unknown text) maps to no session filter
+        session_key = self._session_display_index.get(selection)
+        
+        # The combobox also fires when the same entry is picked again; nothing to redraw then
+        if session_key == self.selected_session:
+            return
+        self.selected_session = session_key
         
         # Update rep list and visualization
         self.update_rep_list()
@@ -1005,50 +1283,46 @@ class RepLabelerApp:
             self.visualize_full_dataset()
     
     def update_rep_list(self):
-        """Update the rep listbox"""
-        self.rep_listbox.delete(0, tk.END)
+        """Update the rep listbox
         
+        When the same reps are listed as before (e.g. after a relabel), only the rows
+        whose text or color changed are rewritten instead of re-inserting every row.
+        """
         if not self.reps_data:
+            self.rep_listbox.delete(0, tk.END)
+            self._listbox_rep_ids = []
+            self._listbox_rows = {}
+            self._listbox_texts = []
+            self._listbox_colors = []
             return
         
-        # Count by quality
+        # Count by quality (maintained incrementally, deleted reps excluded)
         quality_counts = {0: 0, 1: 0, 2: 0}
+        if self.selected_session is not None:
+            quality_counts.update(self._session_quality_counts.get(self.selected_session, {}))
+        else:
+            quality_counts.update(self._quality_counts)
         
         filter_type = self.filter_var.get()
-        
-        for rep_id, rep_info in sorted(self.reps_data.items()):
-            # Skip reps that are marked as completely deleted
-            if rep_id in self.changes_made and self.changes_made[rep_id] == 'DELETED':
-                continue
-            
-            # Filter by selected session
-            if self.selected_session is not None:
-                rep_session_key = rep_info.get('session_key', '')
-                if rep_session_key != self.selected_session:
-                    continue
-            
-            quality = rep_info['quality_code']
-            
-            # Check if this rep has been changed (but not deleted)
-            if rep_id in self.changes_made and self.changes_made[rep_id] != 'DELETED':
-                quality = self.changes_made[rep_id]
-            
-            quality_counts[quality] = quality_counts.get(quality, 0) + 1
-            
-            # Apply filter
-            if filter_type == "Clean" and quality != 0:
-                continue
-            elif filter_type == "Type 1 Error" and quality != 1:
-                continue
-            elif filter_type == "Type 2 Error" and quality != 2:
-                continue
-            elif filter_type == "Changed" and rep_id not in self.changes_made:
-                continue
-            elif filter_type == "Has Deletions" and rep_id not in self.deleted_ranges:
-                continue
+        display_list = []
+        row_colors = []
+        rep_ids = []
+        
+        # Only the reps passing the session/filter masks (deleted reps excluded), with
+        # their labels and colors gathered from the per-code arrays in one go
+        positions = self._displayed_rep_positions(filter_type)
+        qualities = self._rep_stats['quality'][positions]
+        lookup = quality_lookup_index(qualities)
+        
+        for pos, quality, quality_label, color in zip(positions.tolist(), qualities.tolist(),
+                                                      self._quality_label_array[lookup],
+                                                      QUALITY_COLOR_ARRAY[lookup]):
+            rep_id = self._reps_sorted_keys[pos]
+            rep_info = self.reps_data[rep_id]
             
             # Format display - use actual rep_id for proper lookup
-            quality_label = self.current_quality_labels.get(quality, f"Unknown ({quality})")
+            if quality_label is None:
+                quality_label = f"Unknown ({quality})"
             changed_marker = " ✏️" if rep_id in self.changes_made else ""
             deleted_marker = " 🗑️" if rep_id in self.deleted_ranges else ""
             
@@ -1066,12 +1340,38 @@ class RepLabelerApp:
                 # Single session view - simpler format
                 display_text = f"{rep_id:<15} | {quality_label[:12]:<12}{changed_marker}{deleted_marker}"
             
-            self.rep_listbox.insert(tk.END, display_text)
-            
             # Color code by quality
-            idx = self.rep_listbox.size() - 1
-            color = QUALITY_COLORS.get(quality, '#333')
-            self.rep_listbox.itemconfig(idx, fg=color)
+            display_list.append(display_text)
+            row_colors.append(color)
+            rep_ids.append(rep_id)
+        
+        if rep_ids == self._listbox_rep_ids:
+            # Same rows: rewrite just the ones that changed in place
+            for row, (text, color) in enumerate(zip(display_list, row_colors)):
+                if text != self._listbox_texts[row] or color != self._listbox_colors[row]:
+                    self.rep_listbox.delete(row)
+                    self.rep_listbox.insert(row, text)
+                    self.rep_listbox.itemconfig(row, fg=color)
+        else:
+            # Insert all rows in one call; the most common color becomes the listbox
+            # default so only the remaining rows need a per-item itemconfig
+            self.rep_listbox.delete(0, tk.END)
+            self._listbox_rep_ids = rep_ids
+            self._listbox_rows = {rep_id: row for row, rep_id in enumerate(rep_ids)}
+            if display_list:
+                self.rep_listbox.insert(tk.END, *display_list)
+                rows_by_color = {}
+                for row, color in enumerate(row_colors):
+                    rows_by_color.setdefault(color, []).append(row)
+                default_color = max(rows_by_color, key=lambda c: len(rows_by_color[c]))
+                self.rep_listbox.configure(fg=default_color)
+                for color, rows in rows_by_color.items():
+                    if color == default_color:
+                        continue
+                    for idx in rows:
+                        self.rep_listbox.itemconfig(idx, fg=color)
+        self._listbox_texts = display_list
+        self._listbox_colors = row_colors
         
         # Update summary
         total = sum(quality_counts.values())
@@ -1090,6 +1390,11 @@ class RepLabelerApp:
         """Apply the selected filter"""
         self.update_rep_list()
     
+    def _selected_rep_ids(self, selections):
+        """Map selected listbox rows to their rep_ids"""
+        return [self._listbox_rep_ids[idx] for idx in selections
+                if idx < len(self._listbox_rep_ids) and self._listbox_rep_ids[idx] in self.reps_data]
+    
     def on_rep_select(self, event):
         """Handle rep selection from listbox"""
         selections = self.rep_listbox.curselection()
@@ -1098,11 +1403,10 @@ class RepLabelerApp:
         
         if len(selections) == 1:
             # Single selection - show single rep view
-            display_text = self.rep_listbox.get(selections[0])
-            rep_id = display_text.split(" | ")[0].strip()
-            
-            if rep_id not in self.reps_data:
+            selected_rep_ids = self._selected_rep_ids(selections)
+            if not selected_rep_ids:
                 return
+            rep_id = selected_rep_ids[0]
             
             self.selected_rep = rep_id
             
@@ -1113,12 +1417,7 @@ class RepLabelerApp:
             self.clear_selection()
         else:
             # Multiple selection - show multi-rep info
-            selected_rep_ids = []
-            for idx in selections:
-                display_text = self.rep_listbox.get(idx)
-                rep_id = display_text.split(" | ")[0].strip()
-                if rep_id in self.reps_data:
-                    selected_rep_ids.append(rep_id)
+            selected_rep_ids = self._selected_rep_ids(selections)
             
             self.selected_rep = None  # Clear single selection
             self.update_multi_rep_info(selected_rep_ids)
@@ -1133,19 +1432,18 @@ class RepLabelerApp:
             return
         
         rep_info = self.reps_data[rep_id]
-        rep_data = rep_info['data'].copy()
+        has_time = 'timestamp_ms' in self._col_arrays
         
         # Apply any deletions for visualization (show what will be kept)
-        deleted_data = None
-        if rep_id in self.deleted_ranges:
-            # Store deleted data for visual indicator
-            deleted_mask = pd.Series([False] * len(rep_data), index=rep_data.index)
-            for start_time, end_time in self.deleted_ranges[rep_id]:
-                if 'timestamp_ms' in rep_data.columns:
-                    mask = (rep_data['timestamp_ms'] >= start_time) & (rep_data['timestamp_ms'] <= end_time)
-                    deleted_mask = deleted_mask | mask
-            deleted_data = rep_data[deleted_mask].copy()
-            rep_data = rep_data[~deleted_mask]
+        if has_time:
+            deleted_mask = self._deleted_mask(rep_id)
+        else:
+            deleted_mask = np.zeros(rep_info['stop'] - rep_info['start'], dtype=bool)
+        kept_mask = ~deleted_mask
+        num_kept = int(kept_mask.sum())
+        num_deleted = len(deleted_mask) - num_kept
+        # Without deletions, plot the cached column views directly instead of masked copies
+        kept = kept_mask if num_deleted > 0 else slice(None)
         
         # Get quality (check for changes)
         quality = self.changes_made.get(rep_id, rep_info['quality_code'])
@@ -1156,35 +1454,30 @@ class RepLabelerApp:
         self.ax.clear()
         
         # Get time column
-        if 'timestamp_ms' in rep_info['data'].columns:
-            base_time = rep_info['data']['timestamp_ms'].iloc[0]
+        if has_time:
+            rep_times = self._rep_column(rep_id, 'timestamp_ms')
+            all_time = (rep_times - rep_times[0]) / 1000
             xlabel = "Time (seconds)"
-            
-            if len(rep_data) > 0:
-                time_col = (rep_data['timestamp_ms'].values - base_time) / 1000
-            else:
-                time_col = np.array([])
-            
-            if deleted_data is not None and len(deleted_data) > 0:
-                deleted_time = (deleted_data['timestamp_ms'].values - base_time) / 1000
         else:
-            time_col = np.arange(len(rep_data))
+            all_time = np.arange(len(kept_mask))
             xlabel = "Sample Index"
+        time_col = all_time[kept]
         
         # Plot selected signals
-        if len(rep_data) > 0:
+        if num_kept > 0:
             colors = plt.cm.tab10(np.linspace(0, 1, len(self.selected_signals)))
             
             for i, signal in enumerate(self.selected_signals):
-                if signal in rep_data.columns:
-                    self.ax.plot(time_col, rep_data[signal].values, 
+                if signal in self._col_arrays:
+                    self.ax.plot(*downsample_for_plot(time_col, self._rep_column(rep_id, signal)[kept]),
                                label=signal, linewidth=1.5, color=colors[i])
             
             # Plot deleted regions in gray (strikethrough effect)
-            if deleted_data is not None and len(deleted_data) > 0:
+            if num_deleted > 0:
+                deleted_time = all_time[deleted_mask]
                 for i, signal in enumerate(self.selected_signals):
-                    if signal in deleted_data.columns:
-                        self.ax.plot(deleted_time, deleted_data[signal].values, 
+                    if signal in self._col_arrays:
+                        self.ax.plot(*downsample_for_plot(deleted_time, self._rep_column(rep_id, signal)[deleted_mask]),
                                    linewidth=1.5, color='gray', alpha=0.5, linestyle='--')
         
         # Styling
@@ -1204,7 +1497,7 @@ class RepLabelerApp:
         
         self.ax.set_title(title, fontsize=12, fontweight='bold', color=quality_color)
         
-        if len(rep_data) > 0:
+        if num_kept > 0:
             self.ax.legend(loc='upper right', fontsize=8)
         self.ax.grid(True, alpha=0.3)
         
@@ -1216,17 +1509,23 @@ class RepLabelerApp:
     
     def setup_span_selector(self):
         """Setup the span selector for selecting regions to delete"""
+        # Reset selection state
+        self.selection_start = None
+        self.selection_end = None
+        self.selection_var.set("No selection")
+        
+        # Keep the existing selector while its artists are still on the plot
+        # (ax.clear() detaches them, and then it has to be rebuilt)
+        if self.span_selector is not None and self.span_selector.artists[0].axes is self.ax:
+            self.span_selector.clear()
+            return
+        
         # Disconnect and clear any existing span selector
         if self.span_selector:
             self.span_selector.set_visible(False)
             self.span_selector.disconnect_events()
             self.span_selector = None
         
-        # Reset selection state
-        self.selection_start = None
-        self.selection_end = None
-        self.selection_var.set("No selection")
-        
         self.span_selector = SpanSelector(
             self.ax, self.on_select_span, 'horizontal',
             useblit=True,
@@ -1252,18 +1551,20 @@ class RepLabelerApp:
             return
         
         rep_id = self.selected_rep
-        rep_info = self.reps_data[rep_id]
-        rep_data = rep_info['data']
         
         # Convert selection to timestamp_ms
-        if 'timestamp_ms' in rep_data.columns:
-            base_time = rep_data['timestamp_ms'].iloc[0]
+        if 'timestamp_ms' in self._col_arrays:
+            rep_times = self._rep_column(rep_id, 'timestamp_ms')
+            base_time = rep_times[0]
             start_ms = base_time + (self.selection_start * 1000)
             end_ms = base_time + (self.selection_end * 1000)
             
             # Count how many samples will be deleted
-            mask = (rep_data['timestamp_ms'] >= start_ms) & (rep_data['timestamp_ms'] <= end_ms)
-            samples_to_delete = mask.sum()
+            bounds = self._time_range_bounds(rep_id, start_ms, end_ms)
+            if bounds is not None:
+                samples_to_delete = bounds[1] - bounds[0]
+            else:
+                samples_to_delete = int(np.count_nonzero((rep_times >= start_ms) & (rep_times <= end_ms)))
             
             if samples_to_delete == 0:
                 messagebox.showinfo("No Data", "No data points in selected region")
@@ -1274,9 +1575,7 @@ class RepLabelerApp:
                 return
             
             # Store deletion range
-            if rep_id not in self.deleted_ranges:
-                self.deleted_ranges[rep_id] = []
-            self.deleted_ranges[rep_id].append((start_ms, end_ms))
+            self._add_deleted_range(rep_id, start_ms, end_ms)
             
             # Check if entire rep is now deleted (empty)
             remaining_samples = self.get_remaining_samples_count(rep_id)
@@ -1286,10 +1585,7 @@ class RepLabelerApp:
                 if messagebox.askyesno("Remove Rep", 
                                        f"All samples in {rep_id} have been deleted.\n\nRemove this rep entirely?"):
                     # Mark rep for complete removal
-                    if rep_id not in self.changes_made:
-                        self.changes_made[rep_id] = 'DELETED'
-                    else:
-                        self.changes_made[rep_id] = 'DELETED'
+                    self._set_rep_quality(rep_id, 'DELETED')
                     
                     # Clear selection and update UI
                     self.clear_selection()
@@ -1300,7 +1596,7 @@ class RepLabelerApp:
                     # Switch to full dataset view or clear the single rep view
                     self.view_mode_var.set("Full Dataset")
                     if self.df is not None:
-                        self.visualize_full_dataset()
+                        self._schedule_full_redraw()
                     
                     self.rep_info_var.set("Rep removed. Select another rep from the list.")
                     self.current_label_var.set("-")
@@ -1323,40 +1619,84 @@ class RepLabelerApp:
         if rep_id not in self.reps_data:
             return 0
         
-        rep_data = self.reps_data[rep_id]['data']
+        rep_info = self.reps_data[rep_id]
+        num_samples = rep_info['stop'] - rep_info['start']
         
         if rep_id not in self.deleted_ranges or not self.deleted_ranges[rep_id]:
-            return len(rep_data)
+            return num_samples
         
-        if 'timestamp_ms' not in rep_data.columns:
-            return len(rep_data)
+        if 'timestamp_ms' not in self._col_arrays:
+            return num_samples
         
         # Calculate remaining samples after all deletions
-        deleted_mask = pd.Series([False] * len(rep_data), index=rep_data.index)
-        for start_time, end_time in self.deleted_ranges[rep_id]:
-            mask = (rep_data['timestamp_ms'] >= start_time) & (rep_data['timestamp_ms'] <= end_time)
-            deleted_mask = deleted_mask | mask
-        
-        remaining = (~deleted_mask).sum()
+        if rep_info.get('ts_sorted', False):
+            # Ranges are disjoint, so their sample slices don't overlap either
+            deleted = sum(hi - lo for lo, hi in self._deleted_bounds(rep_id))
+        else:
+            deleted = int(np.count_nonzero(self._deleted_mask(rep_id)))
+        remaining = num_samples - deleted
         return remaining
     
+    def _add_deleted_range(self, rep_id, start_ms, end_ms):
+        """Add a deletion range to a rep, keeping its ranges sorted and merging any that overlap"""
+        merged = []
+        for a, b in sorted(self.deleted_ranges.get(rep_id, []) + [(start_ms, end_ms)]):
+            if merged and a <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+            else:
+                merged.append((a, b))
+        self.deleted_ranges[rep_id] = merged
+        self._rep_stats['has_deletions'][self._rep_positions[rep_id]] = True
+    
+    def _deleted_bounds(self, rep_id):
+        """(lo, hi) sample slices of a sorted rep covered by its deleted ranges"""
+        return [self._time_range_bounds(rep_id, start_ms, end_ms)
+                for start_ms, end_ms in self.deleted_ranges.get(rep_id, [])]
+    
+    def _deleted_mask(self, rep_id):
+        """Boolean mask over a rep's samples marking those inside its deleted ranges"""
+        rep_times = self._rep_column(rep_id, 'timestamp_ms')
+        mask = np.zeros(len(rep_times), dtype=bool)
+        ranges = self.deleted_ranges.get(rep_id)
+        if not ranges:
+            return mask
+        
+        if self.reps_data[rep_id].get('ts_sorted', False):
+            # Sorted timestamps: every range is one contiguous slice found by binary search
+            for lo, hi in self._deleted_bounds(rep_id):
+                mask[lo:hi] = True
+        else:
+            for start_time, end_time in ranges:
+                mask |= (rep_times >= start_time) & (rep_times <= end_time)
+        return mask
+    
     def clear_selection(self):
         """Clear the current selection and reset span selector visual"""
         self.selection_start = None
         self.selection_end = None
         self.selection_var.set("No selection")
         
-        # Reset span selector to clear the visual selection
-        if self.span_selector:
+        # Reset the span selector in single rep view (reused when possible), otherwise drop it
+        if self.view_mode_var.get() == "Single Rep" and self.selected_rep:
+            self.setup_span_selector()
+        elif self.span_selector:
             self.span_selector.set_visible(False)
             self.span_selector.disconnect_events()
             self.span_selector = None
         
-        # Recreate span selector if in single rep view
-        if self.view_mode_var.get() == "Single Rep" and self.selected_rep:
-            self.setup_span_selector()
-        
-        self.canvas.draw_idle()
+        if self._plot_background is not None:
+            # Only the span overlay changed: paste back the clean plot instead of redrawing it
+            self.canvas.restore_region(self._plot_background)
+            self.canvas.blit(self.ax.bbox)
+        else:
+            self.canvas.draw_idle()
+    
+    def on_canvas_draw(self, event):
+        """Keep a copy of the single rep plot without a selection for clear_selection"""
+        if self.view_mode_var.get() == "Single Rep" and self.selection_start is None:
+            self._plot_background = self.canvas.copy_from_bbox(self.ax.bbox)
+        else:
+            self._plot_background = None
     
     def undo_rep_deletions(self):
         """Undo deletions for the current rep"""
@@ -1369,6 +1709,7 @@ class RepLabelerApp:
             return
         
         del self.deleted_ranges[self.selected_rep]
+        self._rep_stats['has_deletions'][self._rep_positions[self.selected_rep]] = False
         
         self.visualize_rep(self.selected_rep)
         self.update_rep_list()
@@ -1391,7 +1732,7 @@ class RepLabelerApp:
         exercise = EXERCISE_CODES.get(rep_info.get('exercise_code', self.exercise_code), 'Unknown')
         
         # Compact info for the label editor
-        info_text = f"{rep_id} | P{rep_info['participant']:03d} | {len(rep_info['data'])} samples"
+        info_text = f"{rep_id} | P{rep_info['participant']:03d} | {rep_info['stop'] - rep_info['start']} samples"
         
         if rep_id in self.deleted_ranges:
             total_deletions = len(self.deleted_ranges[rep_id])
@@ -1480,20 +1821,10 @@ class RepLabelerApp:
         
         self.ax.clear()
         
-        # Determine which reps to show based on selected session
-        reps_to_show = {}
-        for rep_id, rep_info in self.reps_data.items():
-            # Skip deleted reps
-            if rep_id in self.changes_made and self.changes_made[rep_id] == 'DELETED':
-                continue
-            
-            # Filter by selected session
-            if self.selected_session is not None:
-                rep_session_key = rep_info.get('session_key', '')
-                if rep_session_key != self.selected_session:
-                    continue
-            
-            reps_to_show[rep_id] = rep_info
+        # Determine which reps to show based on selected session (in display order, deleted reps excluded)
+        positions = self._displayed_rep_positions()
+        reps_to_show = {self._reps_sorted_keys[pos]: self.reps_data[self._reps_sorted_keys[pos]]
+                        for pos in positions.tolist()}
         
         if not reps_to_show:
             self.ax.set_title("No reps to display for selected session")
@@ -1501,35 +1832,39 @@ class RepLabelerApp:
             return
         
         # Get time base for the displayed reps
-        first_rep = list(reps_to_show.values())[0]
-        if 'timestamp_ms' in first_rep['data'].columns:
-            base_time = first_rep['data']['timestamp_ms'].iloc[0]
+        has_time = 'timestamp_ms' in self._col_arrays
+        if has_time:
+            # Time zero is the first shown rep in load order, not display order
+            if self.selected_session is not None:
+                load_order = self.sessions_data[self.selected_session]['reps']
+            else:
+                load_order = self.reps_data
+            first_rep_id = next(rep_id for rep_id in load_order if rep_id in reps_to_show)
+            base_time = self._rep_column(first_rep_id, 'timestamp_ms')[0]
             xlabel = "Time (seconds)"
         else:
             base_time = 0
             xlabel = "Sample Index"
         
-        # Collect rep boundaries for annotation
+        # Collect rep boundaries for annotation, and one line segment per rep/signal
         rep_boundaries = []
+        segments = []
+        segment_colors = []
         rep_idx = 0
         
+        # Effective qualities and their colors for every shown rep
+        qualities = self._rep_stats['quality'][positions]
+        quality_colors = QUALITY_COLOR_ARRAY[quality_lookup_index(qualities)]
+        
         # Plot each rep separately with quality-coded colors
-        for rep_id, rep_info in sorted(reps_to_show.items()):
-            rep_data = rep_info['data'].copy()
-            
-            # Get quality (check for changes, but not if deleted)
-            quality = self.changes_made.get(rep_id, rep_info['quality_code'])
-            if quality == 'DELETED':
-                continue
-            
-            quality_color = QUALITY_COLORS.get(quality, '#333')
-            quality_label = self.current_quality_labels.get(quality, f"Q{quality})")
-            
+        for (rep_id, rep_info), quality, quality_color in zip(reps_to_show.items(), qualities.tolist(),
+                                                              quality_colors):
             # Calculate time values
-            if 'timestamp_ms' in rep_data.columns:
-                time_col = (rep_data['timestamp_ms'].values - base_time) / 1000
+            if has_time:
+                time_col = (self._rep_column(rep_id, 'timestamp_ms') - base_time) / 1000
             else:
-                time_col = np.arange(len(rep_data)) + rep_idx * len(rep_data)
+                num_samples = rep_info['stop'] - rep_info['start']
+                time_col = np.arange(num_samples) + rep_idx * num_samples
             
             # Store rep boundary for annotation
             if len(time_col) > 0:
@@ -1549,30 +1884,34 @@ class RepLabelerApp:
                     'color': quality_color
                 })
             
-            # Plot selected signals for this rep
+            # Selected signals for this rep
             for signal in self.selected_signals:
-                if signal in rep_data.columns:
-                    self.ax.plot(time_col, rep_data[signal].values,
-                               color=quality_color, linewidth=1.2, alpha=0.8)
+                if signal in self._col_arrays:
+                    segments.append(np.column_stack(
+                        downsample_for_plot(time_col, self._rep_column(rep_id, signal))))
+                    segment_colors.append(quality_color)
             
             rep_idx += 1
         
-        # Add vertical lines between reps and rep labels at bottom
-        y_min, y_max = self.ax.get_ylim()
-        label_y = y_min - (y_max - y_min) * 0.05
-        
-        for i, boundary in enumerate(rep_boundaries):
-            # Add vertical separator at rep start (except first)
-            if i > 0:
-                self.ax.axvline(x=boundary['start'], color='gray', linestyle='--', 
-                               alpha=0.3, linewidth=0.8)
-            
-            # Add rep label at top
-            self.ax.annotate(boundary['rep_label'],
-                           xy=(boundary['mid'], y_max),
-                           fontsize=7, ha='center', va='bottom',
-                           color=boundary['color'], fontweight='bold',
-                           alpha=0.7)
+        # Draw every rep/signal in a single collection instead of one Line2D each
+        if segments:
+            self.ax.add_collection(LineCollection(segments, colors=segment_colors,
+                                                  linewidths=1.2, alpha=0.8))
+            self.ax.autoscale_view()
+        
+        # Vertical separators at each rep start (except first), spanning the full axes height
+        if len(rep_boundaries) > 1:
+            self.ax.vlines([b['start'] for b in rep_boundaries[1:]], 0, 1,
+                          transform=self.ax.get_xaxis_transform(),
+                          colors='gray', linestyles='--', alpha=0.3, linewidth=0.8)
+        
+        # Rep labels along the top edge, reusing pooled Text artists
+        for text, boundary in zip(self._rep_label_artists(len(rep_boundaries)), rep_boundaries):
+            text.set_text(boundary['rep_label'])
+            text.set_x(boundary['mid'])
+            text.set_color(boundary['color'])
+            self.ax.add_artist(text)
+            text.set_clip_on(False)
         
         # Create legend for quality types
         legend_elements = []
@@ -1609,8 +1948,19 @@ class RepLabelerApp:
         self.fig.tight_layout()
         self.canvas.draw()
         
-        # Store rep boundaries for click detection
+        # Store rep boundaries for click detection, with the starts sorted for binary search
         self.rep_boundaries = rep_boundaries
+        self._boundary_starts = np.array([b['start'] for b in rep_boundaries], dtype=float)
+        self._boundary_ends = np.array([b['end'] for b in rep_boundaries], dtype=float)
+        self._boundary_order = np.argsort(self._boundary_starts, kind='stable')
+    
+    def _rep_label_artists(self, count):
+        """Return count pooled rep label artists (x in data coords, y at the top of the axes)"""
+        while len(self._rep_label_pool) < count:
+            self._rep_label_pool.append(Text(0, 1, fontsize=7, ha='center', va='bottom',
+                                             fontweight='bold', alpha=0.7,
+                                             transform=self.ax.get_xaxis_transform()))
+        return self._rep_label_pool[:count]
     
     def on_canvas_click(self, event):
         """Handle clicks on the canvas - select rep from full dataset view"""
@@ -1625,25 +1975,24 @@ class RepLabelerApp:
         # Find which rep was clicked based on x coordinate (time)
         clicked_time = event.xdata
         
-        for boundary in self.rep_boundaries:
-            if boundary['start'] <= clicked_time <= boundary['end']:
-                rep_id = boundary['rep_id']
-                
-                # Select the rep in listbox
-                for i in range(self.rep_listbox.size()):
-                    if self.rep_listbox.get(i).startswith(rep_id):
-                        self.rep_listbox.selection_clear(0, tk.END)
-                        self.rep_listbox.selection_set(i)
-                        self.rep_listbox.see(i)
-                        break
-                
-                # Update selected rep and show single rep view
-                self.selected_rep = rep_id
-                self.view_mode_var.set("Single Rep")
-                self.visualize_rep(rep_id)
-                self.update_rep_info(rep_id)
-                self.clear_selection()
-                break
+        # Only boundaries starting at or before the click can contain it; of those that
+        # also end after it, the first in display order wins (boundaries may overlap)
+        started = self._boundary_order[:np.searchsorted(
+            self._boundary_starts[self._boundary_order], clicked_time, side='right')]
+        hits = started[self._boundary_ends[started] >= clicked_time]
+        if hits.size == 0:
+            return
+        rep_id = self.rep_boundaries[hits.min()]['rep_id']
+        
+        # Select the rep in listbox
+        self.reselect_rep(rep_id)
+        
+        # Update selected rep and show single rep view (visualize_rep already
+        # resets the selection and span selector, so no clear_selection pass)
+        self.selected_rep = rep_id
+        self.view_mode_var.set("Single Rep")
+        self.visualize_rep(rep_id)
+        self.update_rep_info(rep_id)
 
     def change_label(self, new_quality):
         """Change the label of the selected rep(s)"""
@@ -1654,12 +2003,7 @@ class RepLabelerApp:
             return
         
         # Extract rep IDs from selections
-        selected_rep_ids = []
-        for idx in selections:
-            display_text = self.rep_listbox.get(idx)
-            rep_id = display_text.split(" | ")[0].strip()
-            if rep_id in self.reps_data:
-                selected_rep_ids.append(rep_id)
+        selected_rep_ids = self._selected_rep_ids(selections)
         
         if not selected_rep_ids:
             messagebox.showwarning("No Valid Selection", "No valid reps selected")
@@ -1672,20 +2016,21 @@ class RepLabelerApp:
                                        f"Change label to '{quality_label}' for {len(selected_rep_ids)} reps?"):
                 return
         
-        # Apply changes to all selected reps
-        changes_made = 0
-        for rep_id in selected_rep_ids:
-            rep_info = self.reps_data[rep_id]
-            original_quality = rep_info['quality_code']
-            
-            if new_quality == original_quality and rep_id not in self.changes_made:
-                continue  # No change needed
-            elif new_quality == original_quality and rep_id in self.changes_made:
-                del self.changes_made[rep_id]  # Revert to original
-                changes_made += 1
-            else:
-                self.changes_made[rep_id] = new_quality  # Apply new label
-                changes_made += 1
+        # Work out the effective changes up front: reps already at the new label are
+        # no-ops, reps whose original label is chosen again revert to it
+        to_revert = [rep_id for rep_id in selected_rep_ids
+                     if new_quality == self.reps_data[rep_id]['quality_code'] and rep_id in self.changes_made]
+        to_apply = [rep_id for rep_id in selected_rep_ids
+                    if new_quality != self.reps_data[rep_id]['quality_code']
+                    and self.changes_made.get(rep_id) != new_quality]
+        changes_made = len(to_revert) + len(to_apply)
+        if not changes_made:
+            return  # Nothing changes, so skip the list rebuild and redraw
+        
+        for rep_id in to_revert:
+            self._set_rep_quality(rep_id, None)  # Revert to original
+        for rep_id in to_apply:
+            self._set_rep_quality(rep_id, new_quality)  # Apply new label
         
         # Update UI
         self.update_rep_list()
@@ -1704,41 +2049,50 @@ class RepLabelerApp:
             # Multiple selection - show full dataset view and multi-rep info
             self.selected_rep = None
             self.view_mode_var.set("Full Dataset")
-            self.visualize_full_dataset()
+            self._schedule_full_redraw()
             self.update_multi_rep_info(selected_rep_ids)
             self.reselect_multiple_reps(selected_rep_ids)
         
         # Show success message
-        if changes_made > 0:
-            quality_label = self.current_quality_labels.get(new_quality, f"Quality {new_quality}")
-            messagebox.showinfo("Label Changed", f"Updated {changes_made} rep(s) to '{quality_label}'")
+        quality_label = self.current_quality_labels.get(new_quality, f"Quality {new_quality}")
+        messagebox.showinfo("Label Changed", f"Updated {changes_made} rep(s) to '{quality_label}'")
     
     def reselect_multiple_reps(self, rep_ids):
         """Re-select multiple reps in the listbox after update"""
         self.rep_listbox.selection_clear(0, tk.END)
         
-        for i in range(self.rep_listbox.size()):
-            display_text = self.rep_listbox.get(i)
-            rep_id = display_text.split(" | ")[0].strip()
-            if rep_id in rep_ids:
-                self.rep_listbox.selection_set(i)
+        rows = np.unique([self._listbox_rows[rep_id] for rep_id in rep_ids if rep_id in self._listbox_rows])
+        if len(rows) == 0:
+            return
+        
+        # One selection_set per contiguous run of rows instead of one per row
+        run_breaks = np.flatnonzero(np.diff(rows) > 1) + 1
+        for run in np.split(rows, run_breaks):
+            self.rep_listbox.selection_set(int(run[0]), int(run[-1]))
+        self.rep_listbox.see(int(rows[0]))
     
     def reselect_rep(self, rep_id):
         """Re-select a rep in the listbox after update"""
-        for i in range(self.rep_listbox.size()):
-            if self.rep_listbox.get(i).startswith(rep_id):
-                self.rep_listbox.selection_clear(0, tk.END)
-                self.rep_listbox.selection_set(i)
-                self.rep_listbox.see(i)
-                break
+        row = self._listbox_rows.get(rep_id)
+        if row is not None:
+            self.rep_listbox.selection_clear(0, tk.END)
+            self.rep_listbox.selection_set(row)
+            self.rep_listbox.see(row)
     
     def update_changes_counter(self):
         """Update the changes counter display"""
+        if not self.changes_made and not self.deleted_ranges:
+            self.changes_var.set("No changes made")
+            return
+        
         changes = []
         
-        # Count label changes vs deleted reps
-        label_changes = sum(1 for v in self.changes_made.values() if v != 'DELETED')
-        deleted_reps = sum(1 for v in self.changes_made.values() if v == 'DELETED')
+        # Count label changes vs deleted reps in one pass
+        deleted_reps = 0
+        for v in self.changes_made.values():
+            if v == 'DELETED':
+                deleted_reps += 1
+        label_changes = len(self.changes_made) - deleted_reps
         
         if label_changes > 0:
             changes.append(f"{label_changes} label change(s)")
@@ -1746,13 +2100,15 @@ class RepLabelerApp:
         if deleted_reps > 0:
             changes.append(f"{deleted_reps} rep(s) removed")
         
-        if self.deleted_ranges:
-            # Only count ranges for non-deleted reps
-            active_deletions = {k: v for k, v in self.deleted_ranges.items() 
-                               if k not in self.changes_made or self.changes_made[k] != 'DELETED'}
-            if active_deletions:
-                total_deletions = sum(len(ranges) for ranges in active_deletions.values())
-                changes.append(f"{total_deletions} deletion(s) in {len(active_deletions)} rep(s)")
+        # Only count ranges for non-deleted reps
+        deletion_reps = 0
+        total_deletions = 0
+        for rep_id, ranges in self.deleted_ranges.items():
+            if self.changes_made.get(rep_id) != 'DELETED':
+                deletion_reps += 1
+                total_deletions += len(ranges)
+        if deletion_reps:
+            changes.append(f"{total_deletions} deletion(s) in {deletion_reps} rep(s)")
         
         if changes:
             self.changes_var.set(f"📝 Pending: {', '.join(changes)}")
@@ -1779,12 +2135,13 @@ class RepLabelerApp:
                                    f"Save changes to:\n{self.current_file}?\n\nChanges: {', '.join(changes_summary)}"):
             return
         
-        self.apply_all_changes()
+        saved_df = self.apply_all_changes()
         
         try:
-            self.df.to_csv(self.current_file, index=False)
+            write_csv(saved_df, self.current_file)
             
-            self.original_df = self.df.copy()
+            self.df = saved_df
+            self._edit_journal = []
             
             for rep_id, new_quality in self.changes_made.items():
                 if rep_id in self.reps_data and new_quality != 'DELETED':
@@ -1808,7 +2165,7 @@ class RepLabelerApp:
                 self.update_rep_info(self.selected_rep)
             else:
                 self.view_mode_var.set("Full Dataset")
-                self.visualize_full_dataset()
+                self._schedule_full_redraw()
             
             messagebox.showinfo("Success", f"Saved!\n• {saved_label_changes} label change(s)\n• {saved_deletions} rep(s) with deletions")
             
@@ -1832,13 +2189,14 @@ class RepLabelerApp:
         if not file_path:
             return
         
-        self.apply_all_changes()
+        saved_df = self.apply_all_changes()
         
         try:
-            self.df.to_csv(file_path, index=False)
+            write_csv(saved_df, file_path)
             
+            self.df = saved_df
             self.current_file = file_path
-            self.original_df = self.df.copy()
+            self._edit_journal = []
             
             for rep_id, new_quality in self.changes_made.items():
                 if rep_id in self.reps_data and new_quality != 'DELETED':
@@ -1861,52 +2219,107 @@ class RepLabelerApp:
                 self.update_rep_info(self.selected_rep)
             else:
                 self.view_mode_var.set("Full Dataset")
-                self.visualize_full_dataset()
+                self._schedule_full_redraw()
             
             messagebox.showinfo("Success", f"Saved to: {Path(file_path).name}\n• {saved_label_changes} label change(s)\n• {saved_deletions} rep(s) with deletions")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save:\n{e}")
     
+    def _journaled_write(self, mask, column, value):
+        """Write value into column for the masked rows, recording the old values for Undo All"""
+        if column in self.df.columns:
+            rows = np.flatnonzero(np.asarray(mask))
+            self._edit_journal.append((column, rows, self.df[column].to_numpy()[rows].copy()))
+        else:
+            self._edit_journal.append((column, None, None))
+        self.df.loc[mask, column] = value
+    
+    def _rollback_journal(self):
+        """Restore the last loaded/saved values by replaying the edit journal backwards"""
+        for column, rows, old_values in reversed(self._edit_journal):
+            if rows is None:
+                self.df = self.df.drop(columns=column)
+            else:
+                self.df.iloc[rows, self.df.columns.get_loc(column)] = old_values
+        self._edit_journal = []
+    
     def apply_all_changes(self):
-        """Apply all pending changes to the dataframe"""
-        # Collect all indices to delete (from fully deleted reps and partial deletions)
-        indices_to_delete = []
+        """Build the dataframe to save with all pending changes applied (self.df is left untouched)"""
+        # Flag all rows to delete by position (from fully deleted reps and partial deletions)
+        drop_rows = np.zeros(len(self.df), dtype=bool)
         
         # Determine which column to use for quality
-        quality_col = get_quality_column_name(self.df)
+        quality_col = self._quality_col
         if quality_col is None:
             # Create quality_code column if neither exists
             quality_col = 'quality_code'
-            self.df['quality_code'] = 0
+            quality = np.zeros(len(self.df), dtype=np.int64)
+        else:
+            quality = self.df[quality_col].to_numpy().copy()
         
-        # Apply label changes (skip deleted reps)
+        # Apply label changes and remove entirely deleted reps, one gather per kind
+        deleted_positions = []
+        relabeled_positions = []
+        new_qualities = []
         for rep_id, new_quality in self.changes_made.items():
+            if rep_id not in self.reps_data:
+                continue
             if new_quality == 'DELETED':
-                # Remove entire rep
-                if rep_id in self.reps_data:
-                    indices_to_delete.extend(self.reps_data[rep_id]['indices'])
-            elif rep_id in self.reps_data:
-                indices = self.reps_data[rep_id]['indices']
-                self.df.loc[indices, quality_col] = new_quality
+                deleted_positions.append(self._rep_positions[rep_id])
+            else:
+                relabeled_positions.append(self._rep_positions[rep_id])
+                new_qualities.append(new_quality)
         
-        # Apply partial deletions (only for non-deleted reps)
-        for rep_id, ranges in self.deleted_ranges.items():
-            # Skip if rep is already fully deleted
-            if rep_id in self.changes_made and self.changes_made[rep_id] == 'DELETED':
-                continue
-            
-            if rep_id in self.reps_data:
-                rep_indices = self.reps_data[rep_id]['indices']
-                rep_data = self.df.loc[rep_indices]
-                
-                for start_ms, end_ms in ranges:
-                    if 'timestamp_ms' in rep_data.columns:
-                        mask = (rep_data['timestamp_ms'] >= start_ms) & (rep_data['timestamp_ms'] <= end_ms)
-                        indices_to_delete.extend(rep_data[mask].index.tolist())
+        rows, _ = self._reps_rows(np.array(deleted_positions, dtype=np.intp))
+        drop_rows[rows] = True
+        rows, counts = self._reps_rows(np.array(relabeled_positions, dtype=np.intp))
+        quality[rows] = np.repeat(np.array(new_qualities, dtype=np.int64), counts)
         
-        if indices_to_delete:
-            self.df = self.df.drop(indices_to_delete).reset_index(drop=True)
+        # Apply partial deletions (only for non-deleted reps)
+        drop_rows[self._partial_deletion_rows()] = True
+        
+        # One positional take is the only copy; the quality column is swapped in on the result
+        keep = np.flatnonzero(~drop_rows)
+        saved_df = self.df.take(keep)
+        saved_df.index = pd.RangeIndex(len(saved_df))
+        saved_df[quality_col] = quality[keep]
+        return saved_df
+    
+    def _partial_deletion_rows(self):
+        """Row positions in self.df inside the deleted ranges of reps that are not removed entirely
+        
+        All ranges are flattened into one interval table (rep slot, start, end) and matched
+        against the reps' timestamps with a single sort, instead of one mask per rep.
+        """
+        rep_ids = [rep_id for rep_id in self.deleted_ranges
+                   if rep_id in self.reps_data and self.changes_made.get(rep_id) != 'DELETED']
+        if not rep_ids or 'timestamp_ms' not in self._col_arrays:
+            return np.zeros(0, dtype=np.intp)
+        
+        # Interval table, ordered by slot then start (each rep's ranges are merged, so disjoint)
+        bounds = np.array([r for rep_id in rep_ids for r in self.deleted_ranges[rep_id]], dtype=float)
+        range_slots = np.repeat(np.arange(len(rep_ids)), [len(self.deleted_ranges[rep_id]) for rep_id in rep_ids])
+        
+        rows, counts = self._reps_rows(np.array([self._rep_positions[rep_id] for rep_id in rep_ids], dtype=np.intp))
+        row_slots = np.repeat(np.arange(len(rep_ids)), counts)
+        times = self.df['timestamp_ms'].to_numpy()[rows].astype(float)
+        
+        # Sort range starts and samples together by (slot, time), starts first on ties, and
+        # carry the latest range forward: it is the only range a sample can fall inside
+        num_ranges = len(bounds)
+        is_sample = np.concatenate([np.zeros(num_ranges, dtype=bool), np.ones(len(rows), dtype=bool)])
+        order = np.lexsort((is_sample, np.concatenate([bounds[:, 0], times]),
+                            np.concatenate([range_slots, row_slots])))
+        last_range = np.maximum.accumulate(np.where(is_sample[order], -1, order))
+        
+        sample_order = is_sample[order]
+        samples = order[sample_order] - num_ranges
+        ranges = last_range[sample_order]
+        inside = ranges >= 0
+        inside[inside] = ((range_slots[ranges[inside]] == row_slots[samples[inside]])
+                          & (times[samples[inside]] <= bounds[ranges[inside], 1]))
+        return rows[samples[inside]]
     
     def undo_all(self):
         """Undo all pending changes"""
@@ -1920,7 +2333,7 @@ class RepLabelerApp:
         
         self.changes_made = {}
         self.deleted_ranges = {}
-        self.df = self.original_df.copy()
+        self._rollback_journal()
         self.parse_reps()
         self.update_session_selector()
         
@@ -1933,7 +2346,7 @@ class RepLabelerApp:
         else:
             self.selected_rep = None
             self.view_mode_var.set("Full Dataset")
-            self.visualize_full_dataset()
+            self._schedule_full_redraw()
         
         messagebox.showinfo("Undone", "All changes have been reverted")
 
@@ -20,11 +20,16 @@ import pandas as pd
 import numpy as np
 from scipy.signal import find_peaks, savgol_filter
 import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+from matplotlib.patches import Patch
 import os
+import re
+import threading
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog, ttk
 from pathlib import Path
+from typing import NamedTuple, Optional
 
 # Get the script's directory and project root
 SCRIPT_DIR = Path(__file__).parent.resolve()  # Points to "AppLift ML Training" folder
@@ -38,6 +43,89 @@ DATASETS_DIR = SCRIPT_DIR  # "AppLift ML Training" directory where CSV files are
 # Ensure directories exist
 VIZ_DIR.mkdir(parents=True, exist_ok=True)
 
+# Exercise names as they appear in (upper-cased) source filenames, in detection
+# priority order, mapped to the canonical exercise name
+_EXERCISE_ALIASES = {
+    'CONCENTRATION_CURLS': 'CONCENTRATION_CURLS',
+    'CONCENTRATION CURLS': 'CONCENTRATION_CURLS',
+    'OVERHEAD_EXTENSION': 'OVERHEAD_EXTENSION',
+    'OVERHEAD EXTENSION': 'OVERHEAD_EXTENSION',
+    'BENCH_PRESS': 'BENCH_PRESS',
+    'BENCH PRESS': 'BENCH_PRESS',
+    'BACK_SQUAT': 'BACK_SQUAT',
+    'BACK SQUAT': 'BACK_SQUAT',
+    'LATERAL_PULLDOWN': 'LATERAL_PULLDOWN',
+    'LATERAL PULLDOWN': 'LATERAL_PULLDOWN',
+    'LAT_PULLDOWN': 'LATERAL_PULLDOWN',
+    'SEATED_LEG_EXTENSION': 'SEATED_LEG_EXTENSION',
+    'SEATED LEG EXTENSION': 'SEATED_LEG_EXTENSION',
+    'LEG_EXTENSION': 'SEATED_LEG_EXTENSION',
+}
+_EXERCISE_PRIORITY = {name: i for i, name in enumerate(dict.fromkeys(_EXERCISE_ALIASES.values()))}
+_EXERCISE_RE = re.compile('|'.join(re.escape(alias) for alias in _EXERCISE_ALIASES))
+
+
+class RepParams(NamedTuple):
+    """Valley-detection parameters for one exercise family"""
+    family: str                   # Name reported when the parameters are applied
+    prominence_factor: float      # Share of the signal range a valley must stand out by
+    std_factor: float             # Share of the signal std a valley must stand out by
+    min_prominence_floor: float   # Absolute lower bound on the valley prominence
+    min_rep_ms: Optional[int]     # Raises the caller's minimum rep duration (None: keep it)
+    max_rep_ms: Optional[int]     # Lowers the caller's maximum rep duration (None: keep it)
+    min_distance_sec: float       # Minimum time between valleys
+
+
+_WEIGHT_STACK_PARAMS = RepParams('WEIGHT_STACK', 0.05, 0.3, 0.05, 1500, 12000, 1.5)
+
+# Exercise-specific parameters, looked up by canonical exercise name
+EXERCISE_PARAMS = {
+    # Concentration Curls: Controlled arm curls with defined peaks/valleys
+    'CONCENTRATION_CURLS': RepParams('CONCENTRATION_CURLS', 0.1, 0.5, 0.1, 800, 8000, 0.5),
+    # Overhead Extension: Overhead tricep movements
+    'OVERHEAD_EXTENSION': RepParams('OVERHEAD_EXTENSION', 0.1, 0.5, 0.1, 800, 8000, 0.5),
+    # Bench Press: Larger compound movement
+    'BENCH_PRESS': RepParams('BENCH_PRESS', 0.1, 0.5, 0.1, 1000, 10000, 0.5),
+    # Back Squat: Lower body compound movement
+    'BACK_SQUAT': RepParams('BACK_SQUAT', 0.1, 0.5, 0.1, 1200, 12000, 0.5),
+    # Weight Stack exercises: Cable machine with smoother signals and slower reps
+    'LATERAL_PULLDOWN': _WEIGHT_STACK_PARAMS,
+    'SEATED_LEG_EXTENSION': _WEIGHT_STACK_PARAMS,
+}
+
+# Default/Unknown: Use conservative parameters
+DEFAULT_PARAMS = RepParams('DEFAULT', 0.1, 0.5, 0.1, None, None, 0.5)
+
+# Quality labels per exercise: dumbbell, barbell and weight stack exercises name their
+# two error types differently
+_DUMBBELL_LABELS = {0: 'Clean', 1: 'Uncontrolled Movement', 2: 'Abrupt Initiation'}
+_BARBELL_LABELS = {0: 'Clean', 1: 'Uncontrolled Movement', 2: 'Inclination Asymmetry'}
+_WEIGHT_STACK_LABELS = {0: 'Clean', 1: 'Pulling Too Fast', 2: 'Releasing Too Fast'}
+QUALITY_LABELS = {
+    'CONCENTRATION_CURLS': _DUMBBELL_LABELS, 'OVERHEAD_EXTENSION': _DUMBBELL_LABELS,
+    'BENCH_PRESS': _BARBELL_LABELS, 'BACK_SQUAT': _BARBELL_LABELS,
+    'LATERAL_PULLDOWN': _WEIGHT_STACK_LABELS, 'SEATED_LEG_EXTENSION': _WEIGHT_STACK_LABELS,
+}
+DEFAULT_QUALITY_LABELS = {0: 'Clean', 1: 'Quality Issue 1', 2: 'Quality Issue 2'}
+
+# Shorter forms of the same labels for the session selector's table columns
+_DUMBBELL_SHORT_LABELS = {0: 'Clean', 1: 'Uncontrolled', 2: 'Abrupt'}
+_BARBELL_SHORT_LABELS = {0: 'Clean', 1: 'Uncontrolled', 2: 'Inclination'}
+_WEIGHT_STACK_SHORT_LABELS = {0: 'Clean', 1: 'Pull Fast', 2: 'Release Fast'}
+SHORT_QUALITY_LABELS = {
+    'CONCENTRATION_CURLS': _DUMBBELL_SHORT_LABELS, 'OVERHEAD_EXTENSION': _DUMBBELL_SHORT_LABELS,
+    'BENCH_PRESS': _BARBELL_SHORT_LABELS, 'BACK_SQUAT': _BARBELL_SHORT_LABELS,
+    'LATERAL_PULLDOWN': _WEIGHT_STACK_SHORT_LABELS, 'SEATED_LEG_EXTENSION': _WEIGHT_STACK_SHORT_LABELS,
+}
+DEFAULT_SHORT_QUALITY_LABELS = {0: 'Clean', 1: 'Quality 1', 2: 'Quality 2'}
+
+# Distinct colors for reps 1-10 (later reps reuse them)
+_TAB10 = plt.cm.tab10(np.linspace(0, 1, 10))
+
+# Columns the participant & session analysis reads; other dataset columns are not loaded
+SESSION_COLUMNS = ('participant', 'source_file', 'rep', 'timestamp_ms', 'filteredMag',
+                   'quality_code', 'target', 'quality')
+
 
 def select_from_datasets_ui():
     """
@@ -79,31 +167,51 @@ def select_from_datasets_ui():
     datasets_dir = str(DATASETS_DIR)
     data_dir = str(DATA_DIR)
     
-    def populate_tree(parent, path):
-        """Recursively populate tree with folder contents"""
-        try:
-            items = sorted(os.listdir(path))
-            for item in items:
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    # Folder - add with folder icon
-                    node = tree.insert(parent, 'end', text=f"📁 {item}", open=False, values=(item_path,))
-                    populate_tree(node, item_path)
-                elif item.endswith('.csv'):
-                    # CSV file - add with file icon
-                    tree.insert(parent, 'end', text=f"📄 {item}", values=(item_path,))
-        except PermissionError:
-            pass
-    
-    # Add datasets folder
-    if os.path.exists(datasets_dir):
-        datasets_node = tree.insert('', 'end', text='📁 datasets', open=True, values=(datasets_dir,))
-        populate_tree(datasets_node, datasets_dir)
-    
-    # Add data folder
-    if os.path.exists(data_dir):
-        data_node = tree.insert('', 'end', text='📁 data', open=True, values=(data_dir,))
-        populate_tree(data_node, data_dir)
+    def scan_tree(path):
+        """Walk path once and list (parent_path, name, item_path, is_dir) for folders and CSV files"""
+        entries = []
+        # os.walk is scandir-based (no extra stat per entry) and skips unreadable folders
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            folders = set(dirnames)
+            for item in sorted(dirnames + [f for f in filenames if f.endswith('.csv')]):
+                entries.append((dirpath, item, os.path.join(dirpath, item), item in folders))
+        return entries
+    
+    def populate_tree(parent, path, entries):
+        """Insert the scanned folder contents under parent (on the Tk thread)"""
+        nodes = {path: parent}
+        for dirpath, item, item_path, is_dir in entries:
+            if is_dir:
+                # Folder - add with folder icon
+                nodes[item_path] = tree.insert(nodes[dirpath], 'end', text=f"📁 {item}", open=False, values=(item_path,))
+            else:
+                # CSV file - add with file icon
+                tree.insert(nodes[dirpath], 'end', text=f"📄 {item}", values=(item_path,))
+    
+    # Root folders to list (datasets and data may be the same folder, which is scanned once)
+    roots = [(label, path) for label, path in [('datasets', datasets_dir), ('data', data_dir)]
+             if os.path.exists(path)]
+    scans = {}
+    
+    def scan_all():
+        for path in dict.fromkeys(path for _, path in roots):
+            scans[path] = scan_tree(path)
+    
+    # Walk the folders off the Tk thread so the window stays responsive on deep trees
+    scan_thread = threading.Thread(target=scan_all, daemon=True)
+    scan_thread.start()
+    
+    def poll_scan():
+        """Fill the tree once the background scan has finished"""
+        if scan_thread.is_alive():
+            root.after(50, poll_scan)
+            return
+        for label, path in roots:
+            node = tree.insert('', 'end', text=f'📁 {label}', open=True, values=(path,))
+            populate_tree(node, path, scans.get(path, []))
+    
+    poll_scan()
     
     # Selected file label
     selected_label = tk.Label(root, text="Selected: None", 
@@ -190,7 +298,21 @@ def select_from_datasets_ui():
     return selected_file[0]
 
 
-def find_valleys(signal, distance=15, prominence=0.3):
+def detect_exercise_name(source_file):
+    """
+    Detect the exercise from a source filename
+    
+    One regex scan finds every known exercise name in the filename; when several
+    appear, the earliest in _EXERCISE_ALIASES wins.
+    
+    Returns:
+    - Canonical exercise name, or "UNKNOWN" if none is found
+    """
+    found = {_EXERCISE_ALIASES[m.group(0)] for m in _EXERCISE_RE.finditer(source_file.upper())}
+    return min(found, key=_EXERCISE_PRIORITY.get, default="UNKNOWN")
+
+
+def find_valleys(signal, distance=15, prominence=0.3, out=None):
     """
     Find valleys (local minima) in the signal by inverting and finding peaks
     
@@ -198,17 +320,76 @@ def find_valleys(signal, distance=15, prominence=0.3):
     - signal: The signal array to analyze
     - distance: Minimum distance between valleys (in samples)
     - prominence: Minimum prominence of valleys
+    - out: Optional float buffer the same length as signal to hold the inverted
+      signal, so repeated searches over one signal reuse a single allocation
     
     Returns:
     - valley_indices: Array of indices where valleys occur
     - valley_properties: Properties of the valleys
     """
     # Invert signal to find minima as peaks
-    inverted = -signal
+    inverted = np.negative(signal, out=out)
     peaks, properties = find_peaks(inverted, distance=distance, prominence=prominence)
     return peaks, properties
 
 
+def filter_valleys_by_duration(timestamps, valley_indices, min_rep_duration_ms, max_rep_duration_ms):
+    """
+    Greedily keep the valleys that lie within the allowed rep duration of the
+    previously kept valley, starting from sample 0
+    
+    Parameters:
+    - timestamps: Timestamp array (ms) of the signal
+    - valley_indices: Candidate valley indices, in ascending order
+    - min_rep_duration_ms / max_rep_duration_ms: Allowed gap between kept valleys
+    
+    Returns:
+    - valid_valleys: List of kept sample indices, beginning with 0
+    """
+    # Walk plain Python values rather than indexing numpy arrays per candidate
+    valley_list = np.asarray(valley_indices, dtype=np.int64).tolist()
+    if not valley_list:
+        return [0]
+    valley_times = np.asarray(timestamps)[valley_list].tolist()
+    
+    valid_valleys = [0]
+    last_valley_time = timestamps[0]
+    for idx, current_valley_time in zip(valley_list, valley_times):
+        # Check if this valley is far enough from the last valid valley
+        duration_ms = current_valley_time - last_valley_time
+        if duration_ms >= min_rep_duration_ms and duration_ms <= max_rep_duration_ms:
+            valid_valleys.append(idx)
+            last_valley_time = current_valley_time
+    
+    return valid_valleys
+
+
+def segment_argmax(values, bounds):
+    """
+    Index of the maximum of values within each segment [bounds[i], bounds[i+1])
+    
+    Matches np.argmax per segment (first index on ties, first NaN if a segment has one)
+    using one np.maximum.reduceat over all segments instead of a call per segment.
+    """
+    bounds = np.asarray(bounds, dtype=np.int64)
+    if len(bounds) < 2:
+        return np.zeros(0, dtype=np.int64)
+    
+    covered = values[bounds[0]:bounds[-1]]
+    starts = bounds[:-1] - bounds[0]
+    segment_max = np.maximum.reduceat(covered, starts)
+    segment_of = np.repeat(np.arange(len(starts)), np.diff(bounds))
+    
+    at_max = covered == segment_max[segment_of]
+    nan_max = np.isnan(segment_max)
+    if nan_max.any():
+        at_max |= np.isnan(covered) & nan_max[segment_of]
+    
+    # First hit at or after each segment start
+    hits = np.flatnonzero(at_max)
+    return bounds[0] + hits[np.searchsorted(hits, starts)]
+
+
 def resegment_reps(df, signal_column='filteredMag', min_rep_duration_ms=800, max_rep_duration_ms=8000):
     """
     Re-segment reps based on valley-to-valley detection
@@ -227,16 +408,21 @@ def resegment_reps(df, signal_column='filteredMag', min_rep_duration_ms=800, max
     """
     # Check if we need to process by source file
     if 'source_file' in df.columns:
-        source_files = df['source_file'].unique()
+        # Group rows by source file with one stable sort (sources keep their order of
+        # appearance) instead of one full boolean scan of the DataFrame per source
+        codes, source_files = pd.factorize(df['source_file'])
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.searchsorted(sorted_codes, np.arange(len(source_files)), side='left')
+        stops = np.searchsorted(sorted_codes, np.arange(len(source_files)), side='right')
         print(f"  Processing {len(source_files)} source files separately...")
         
         all_resegmented = []
         all_rep_info = []
         rep_offset = 0
         
-        for source in source_files:
-            df_source = df[df['source_file'] == source].copy()
-            df_source = df_source.reset_index(drop=True)
+        for source, start, stop in zip(source_files, starts, stops):
+            df_source = df.iloc[order[start:stop]].reset_index(drop=True)
             
             print(f"\n  📄 Processing: {source}")
             
@@ -287,22 +473,8 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
     # Detect exercise type from source_file column (filename-based detection)
     exercise_name = "UNKNOWN"
     if 'source_file' in df.columns:
-        source_file = df['source_file'].iloc[0]
-        source_file_upper = source_file.upper()
-        
         # Extract exercise name from filename
-        if 'CONCENTRATION_CURLS' in source_file_upper or 'CONCENTRATION CURLS' in source_file_upper:
-            exercise_name = "CONCENTRATION_CURLS"
-        elif 'OVERHEAD_EXTENSION' in source_file_upper or 'OVERHEAD EXTENSION' in source_file_upper:
-            exercise_name = "OVERHEAD_EXTENSION"
-        elif 'BENCH_PRESS' in source_file_upper or 'BENCH PRESS' in source_file_upper:
-            exercise_name = "BENCH_PRESS"
-        elif 'BACK_SQUAT' in source_file_upper or 'BACK SQUAT' in source_file_upper:
-            exercise_name = "BACK_SQUAT"
-        elif 'LATERAL_PULLDOWN' in source_file_upper or 'LATERAL PULLDOWN' in source_file_upper or 'LAT_PULLDOWN' in source_file_upper:
-            exercise_name = "LATERAL_PULLDOWN"
-        elif 'SEATED_LEG_EXTENSION' in source_file_upper or 'SEATED LEG EXTENSION' in source_file_upper or 'LEG_EXTENSION' in source_file_upper:
-            exercise_name = "SEATED_LEG_EXTENSION"
+        exercise_name = detect_exercise_name(df['source_file'].iloc[0])
     
     print(f"  📋 Detected exercise: {exercise_name}")
     
@@ -311,18 +483,7 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
         quality_counts = df['target'].value_counts().sort_index()
         
         # Quality labels depend on exercise type
-        if exercise_name in ["CONCENTRATION_CURLS", "OVERHEAD_EXTENSION"]:
-            # Dumbbell exercises
-            quality_labels = {0: 'Clean', 1: 'Uncontrolled Movement', 2: 'Abrupt Initiation'}
-        elif exercise_name in ["BENCH_PRESS", "BACK_SQUAT"]:
-            # Barbell exercises
-            quality_labels = {0: 'Clean', 1: 'Uncontrolled Movement', 2: 'Inclination Asymmetry'}
-        elif exercise_name in ["LATERAL_PULLDOWN", "SEATED_LEG_EXTENSION"]:
-            # Weight Stack exercises
-            quality_labels = {0: 'Clean', 1: 'Pulling Too Fast', 2: 'Releasing Too Fast'}
-        else:
-            # Default/Unknown
-            quality_labels = {0: 'Clean', 1: 'Quality Issue 1', 2: 'Quality Issue 2'}
+        quality_labels = QUALITY_LABELS.get(exercise_name, DEFAULT_QUALITY_LABELS)
         
         print(f"  📊 Quality distribution in data:")
         for quality_code, count in quality_counts.items():
@@ -331,63 +492,21 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
         print(f"  ℹ️  Note: Quality labels are preserved from the 'target' column, not changed by resegmentation")
     
     # Exercise-specific parameters based on exercise name
-    if exercise_name == "CONCENTRATION_CURLS":
-        # Concentration Curls: Controlled arm curls with defined peaks/valleys
-        signal_column = 'filteredMag'
-        prominence_factor = 0.1
-        std_factor = 0.5
-        min_prominence_floor = 0.1
-        min_rep_duration_ms = max(min_rep_duration_ms, 800)
-        max_rep_duration_ms = min(max_rep_duration_ms, 8000)
-        print(f"  ✓ Using CONCENTRATION_CURLS parameters")
-        
-    elif exercise_name == "OVERHEAD_EXTENSION":
-        # Overhead Extension: Overhead tricep movements
-        signal_column = 'filteredMag'
-        prominence_factor = 0.1
-        std_factor = 0.5
-        min_prominence_floor = 0.1
-        min_rep_duration_ms = max(min_rep_duration_ms, 800)
-        max_rep_duration_ms = min(max_rep_duration_ms, 8000)
-        print(f"  ✓ Using OVERHEAD_EXTENSION parameters")
-        
-    elif exercise_name == "BENCH_PRESS":
-        # Bench Press: Larger compound movement
-        signal_column = 'filteredMag'
-        prominence_factor = 0.1
-        std_factor = 0.5
-        min_prominence_floor = 0.1
-        min_rep_duration_ms = max(min_rep_duration_ms, 1000)
-        max_rep_duration_ms = min(max_rep_duration_ms, 10000)
-        print(f"  ✓ Using BENCH_PRESS parameters")
-        
-    elif exercise_name == "BACK_SQUAT":
-        # Back Squat: Lower body compound movement
-        signal_column = 'filteredMag'
-        prominence_factor = 0.1
-        std_factor = 0.5
-        min_prominence_floor = 0.1
-        min_rep_duration_ms = max(min_rep_duration_ms, 1200)
-        max_rep_duration_ms = min(max_rep_duration_ms, 12000)
-        print(f"  ✓ Using BACK_SQUAT parameters")
-        
-    elif exercise_name in ["LATERAL_PULLDOWN", "SEATED_LEG_EXTENSION"]:
-        # Weight Stack exercises: Cable machine with smoother signals
-        signal_column = 'filteredMag'
-        prominence_factor = 0.05
-        std_factor = 0.3
-        min_prominence_floor = 0.05
-        min_rep_duration_ms = max(min_rep_duration_ms, 1500)
-        max_rep_duration_ms = min(max_rep_duration_ms, 12000)
-        print(f"  ✓ Using WEIGHT_STACK parameters for {exercise_name}")
-        
-    else:
-        # Default/Unknown: Use conservative parameters
-        signal_column = 'filteredMag'
-        prominence_factor = 0.1
-        std_factor = 0.5
-        min_prominence_floor = 0.1
+    params = EXERCISE_PARAMS.get(exercise_name, DEFAULT_PARAMS)
+    signal_column = 'filteredMag'
+    prominence_factor = params.prominence_factor
+    std_factor = params.std_factor
+    min_prominence_floor = params.min_prominence_floor
+    if params.min_rep_ms is not None:
+        min_rep_duration_ms = max(min_rep_duration_ms, params.min_rep_ms)
+    if params.max_rep_ms is not None:
+        max_rep_duration_ms = min(max_rep_duration_ms, params.max_rep_ms)
+    if params is DEFAULT_PARAMS:
         print(f"  ⚠️ Using DEFAULT parameters for unknown exercise")
+    elif params.family == exercise_name:
+        print(f"  ✓ Using {params.family} parameters")
+    else:
+        print(f"  ✓ Using {params.family} parameters for {exercise_name}")
     
     # Verify signal column exists
     if signal_column not in df.columns:
@@ -396,8 +515,10 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
     
     print(f"  Using signal column: '{signal_column}'")
     
-    signal = df[signal_column].values
-    timestamps = df['timestamp_ms'].values
+    # Pull the columns out once: a contiguous float64 signal for the SciPy filter and
+    # peak search, and the timestamps in their own dtype for the reported times
+    signal = np.ascontiguousarray(df[signal_column].to_numpy(dtype=np.float64))
+    timestamps = df['timestamp_ms'].to_numpy()
     
     # Smooth the signal - use stronger smoothing for weight stack exercises
     if exercise_name in ["LATERAL_PULLDOWN", "SEATED_LEG_EXTENSION"]:
@@ -426,12 +547,8 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
         median_dt = np.median(np.diff(timestamps))
         sample_rate = 1000 / median_dt  # Hz
         
-        if exercise_name in ["LATERAL_PULLDOWN", "SEATED_LEG_EXTENSION"]:
-            # Weight stack reps are slower - minimum 1.5 seconds between valleys
-            min_distance = int(1.5 * sample_rate)
-        else:
-            # Other exercises - minimum 0.5 seconds between valleys
-            min_distance = int(0.5 * sample_rate)
+        # Weight stack reps are slower (1.5 s between valleys), other exercises 0.5 s
+        min_distance = int(params.min_distance_sec * sample_rate)
     else:
         min_distance = 5
     
@@ -444,18 +561,30 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
     print(f"  Min rep duration: {min_rep_duration_ms}ms")
     print(f"  Max rep duration: {max_rep_duration_ms}ms")
     
-    # Find all valleys
-    valley_indices, valley_props = find_valleys(signal_smooth, distance=min_distance, prominence=min_prominence)
+    # Find all valleys (the inverted signal buffer is shared by every search below).
+    # A flat signal has no local minima or maxima, so it skips the peak searches. Test the
+    # raw signal: smoothing a constant leaves floating-point ripple of ~1e-15.
+    signal_is_flat = np.ptp(signal) == 0
+    inverted_buf = np.empty_like(signal_smooth)
+    if signal_is_flat:
+        valley_indices = np.array([], dtype=np.intp)
+    else:
+        valley_indices, valley_props = find_valleys(signal_smooth, distance=min_distance, prominence=min_prominence,
+                                                    out=inverted_buf)
     
     print(f"\nFound {len(valley_indices)} potential valleys")
     
+    if signal_is_flat:
+        print("  ⚠️ Signal is flat - skipping the lower-prominence and peak detection retries")
+    
     # If too few valleys found, try with lower prominence (applies to ALL exercises)
-    if len(valley_indices) < 2:
+    elif len(valley_indices) < 2:
         print("  ⚠️ Too few valleys found - trying with lower prominence...")
         # Try progressively lower prominence
         for retry_factor in [0.5, 0.25, 0.1]:
             retry_prominence = min_prominence * retry_factor
-            valley_indices, valley_props = find_valleys(signal_smooth, distance=min_distance, prominence=retry_prominence)
+            valley_indices, valley_props = find_valleys(signal_smooth, distance=min_distance, prominence=retry_prominence,
+                                                        out=inverted_buf)
             print(f"  Retry with prominence={retry_prominence:.4f}: found {len(valley_indices)} valleys")
             if len(valley_indices) >= 2:
                 min_prominence = retry_prominence
@@ -470,17 +599,9 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
                 print(f"  Found {len(peak_indices)} peaks - using peaks as boundaries")
                 valley_indices = peak_indices
     
-    # Filter valleys by minimum rep duration
-    valid_valleys = [0]  # Always start from the beginning
-    
-    for i, idx in enumerate(valley_indices):
-        # Check if this valley is far enough from the last valid valley
-        last_valley_time = timestamps[valid_valleys[-1]]
-        current_valley_time = timestamps[idx]
-        duration_ms = current_valley_time - last_valley_time
-        
-        if duration_ms >= min_rep_duration_ms and duration_ms <= max_rep_duration_ms:
-            valid_valleys.append(idx)
+    # Filter valleys by minimum rep duration (always start from the beginning)
+    valid_valleys = filter_valleys_by_duration(timestamps, valley_indices,
+                                               min_rep_duration_ms, max_rep_duration_ms)
     
     # Add the last index if not already included
     if valid_valleys[-1] != len(df) - 1:
@@ -490,21 +611,33 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
         if end_time - last_valley_time >= min_rep_duration_ms:
             # Find the actual valley closest to the end
             remaining_signal = signal_smooth[valid_valleys[-1]:]
-            if len(remaining_signal) > min_distance:
-                local_valleys, _ = find_valleys(remaining_signal, distance=min_distance//2, prominence=min_prominence*0.5)
+            if len(remaining_signal) > min_distance and not signal_is_flat:
+                local_valleys, _ = find_valleys(remaining_signal, distance=min_distance//2, prominence=min_prominence*0.5,
+                                                out=inverted_buf[:len(remaining_signal)])
                 if len(local_valleys) > 0:
                     valid_valleys.append(valid_valleys[-1] + local_valleys[-1])
     
     # Fallback: if we only have the start boundary, use original rep boundaries refined with valleys
-    original_reps = sorted([r for r in df['rep'].unique() if r > 0]) if 'rep' in df.columns else []
+    if 'rep' in df.columns:
+        original_reps = np.unique(df['rep'].to_numpy())  # Sorted, NaN last
+        original_reps = original_reps[original_reps > 0].tolist()
+    else:
+        original_reps = []
     if len(valid_valleys) <= 1 and len(original_reps) >= 1:
         print(f"\n⚠️ Valley detection failed - using original rep boundaries as guide")
         print(f"  Original reps found: {original_reps}")
         
+        # Positions of every rep from one stable sort: a rep's rows are a contiguous
+        # run of the sort order, in ascending position
+        rep_values = df['rep'].to_numpy()
+        rep_order = np.argsort(rep_values, kind='stable')
+        sorted_reps = rep_values[rep_order]
+        rep_starts = np.searchsorted(sorted_reps, original_reps, side='left')
+        rep_stops = np.searchsorted(sorted_reps, original_reps, side='right')
+        
         valid_valleys = [0]
-        for rep in original_reps:
-            rep_mask = df['rep'] == rep
-            rep_indices = np.where(rep_mask)[0]
+        for run_start, run_stop in zip(rep_starts, rep_stops):
+            rep_indices = rep_order[run_start:run_stop]
             if len(rep_indices) == 0:
                 continue
             
@@ -538,84 +671,107 @@ def resegment_single_source(df, signal_column='filteredMag', min_rep_duration_ms
     print(f"Valley indices: {valid_valleys[:10]}{'...' if len(valid_valleys) > 10 else ''}")
     print(f"Valley timestamps: {[timestamps[v] for v in valid_valleys[:10]]}{'...' if len(valid_valleys) > 10 else ''}")
     
-    # Create new rep labels based on valley boundaries
-    df_resegmented = df.copy()
-    df_resegmented['rep_original'] = df_resegmented['rep'].copy()  # Keep original for comparison
-    df_resegmented['rep'] = 0
+    # Create new rep labels based on valley boundaries: rep i + 1 runs from valley i up
+    # to (not including) valley i + 1, and the last valley's rep runs to the end
+    boundaries = np.asarray(valid_valleys, dtype=np.int64)
+    rep_labels = np.zeros(len(df), dtype=np.int64)
+    rep_labels[boundaries[0]:boundaries[-1]] = np.repeat(np.arange(1, len(boundaries), dtype=np.int64),
+                                                         np.diff(boundaries))
+    if boundaries[-1] < len(df) - 1:
+        rep_labels[boundaries[-1]:] = len(boundaries)
+    
+    # Keep original for comparison; both columns go in with the one copy assign makes
+    df_resegmented = df.assign(rep_original=df['rep'].to_numpy(copy=True), rep=rep_labels)
+    
+    # Per-rep fields as whole columns: rep i spans segment_bounds[i] up to (not including)
+    # segment_bounds[i + 1]; a trailing rep from the last valley runs to the end
+    segment_bounds = boundaries if boundaries[-1] >= len(df) - 1 else np.append(boundaries, len(df))
+    start_indices = segment_bounds[:-1]
+    end_indices = segment_bounds[1:] - 1
+    peak_indices = segment_argmax(signal_smooth, segment_bounds)
+    
+    start_times = timestamps[start_indices]
+    end_times = timestamps[end_indices]
+    peak_values = signal[peak_indices]
+    valley_values = signal[start_indices]
+    
+    columns = {
+        'rep': np.arange(1, len(start_indices) + 1).tolist(),
+        'start_idx': start_indices.tolist(),
+        'end_idx': end_indices.tolist(),
+        'next_rep_start_idx': (end_indices + 1).tolist(),
+        'start_time_ms': start_times.tolist(),
+        'end_time_ms': end_times.tolist(),
+        'duration_ms': (end_times - start_times).tolist(),
+        'peak_idx': peak_indices.tolist(),
+        'peak_time_ms': timestamps[peak_indices].tolist(),
+        'peak_value': peak_values.tolist(),
+        'valley_value': valley_values.tolist(),
+        'amplitude': (peak_values - valley_values).tolist(),
+    }
+    rep_info = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    
+    # The trailing rep has no next rep to point at
+    if len(segment_bounds) > len(boundaries):
+        del rep_info[-1]['next_rep_start_idx']
     
-    rep_info = []
+    return df_resegmented, rep_info
+
+
+def shade_rep_spans(ax, reps, start_times, end_times, colors=None):
+    """
+    Shade every rep's time span across the full height of ax, like one axvspan per
+    rep but drawn as a single PolyCollection
     
-    for i in range(len(valid_valleys) - 1):
-        start_idx = valid_valleys[i]
-        end_idx = valid_valleys[i + 1]
-        rep_num = i + 1
-        
-        # Assign rep number to all samples in this range
-        df_resegmented.loc[start_idx:end_idx-1, 'rep'] = rep_num
-        
-        # Store rep info
-        start_time = timestamps[start_idx]
-        end_time = timestamps[end_idx - 1]
-        
-        # Find peak within this rep
-        rep_signal = signal_smooth[start_idx:end_idx]
-        peak_local_idx = np.argmax(rep_signal)
-        peak_idx = start_idx + peak_local_idx
-        peak_time = timestamps[peak_idx]
-        peak_value = signal[peak_idx]
-        valley_value = signal[start_idx]
-        
-        rep_info.append({
-            'rep': rep_num,
-            'start_idx': start_idx,
-            'end_idx': end_idx - 1,
-            'next_rep_start_idx': end_idx,
-            'start_time_ms': start_time,
-            'end_time_ms': end_time,
-            'duration_ms': end_time - start_time,
-            'peak_idx': peak_idx,
-            'peak_time_ms': peak_time,
-            'peak_value': peak_value,
-            'valley_value': valley_value,
-            'amplitude': peak_value - valley_value
-        })
-    
-    # Handle the last segment (from last valley to end)
-    if valid_valleys[-1] < len(df) - 1:
-        start_idx = valid_valleys[-1]
-        end_idx = len(df) - 1
-        rep_num = len(valid_valleys)
-        
-        df_resegmented.loc[start_idx:end_idx, 'rep'] = rep_num
-        
-        start_time = timestamps[start_idx]
-        end_time = timestamps[end_idx]
-        
-        rep_signal = signal_smooth[start_idx:end_idx+1]
-        peak_local_idx = np.argmax(rep_signal)
-        peak_idx = start_idx + peak_local_idx
-        peak_time = timestamps[peak_idx]
-        peak_value = signal[peak_idx]
-        valley_value = signal[start_idx]
-        
-        rep_info.append({
-            'rep': rep_num,
-            'start_idx': start_idx,
-            'end_idx': end_idx,
-            'start_time_ms': start_time,
-            'end_time_ms': end_time,
-            'duration_ms': end_time - start_time,
-            'peak_idx': peak_idx,
-            'peak_time_ms': peak_time,
-            'peak_value': peak_value,
-            'valley_value': valley_value,
-            'amplitude': peak_value - valley_value
-        })
+    Colors default to tab10 spread over the number of reps.
     
-    return df_resegmented, rep_info
+    Returns:
+    - List of legend handles, one 'Rep N' patch per rep
+    """
+    if colors is None:
+        colors = plt.cm.tab10(np.linspace(0, 1, len(reps)))
+    xs = np.column_stack([start_times, start_times, end_times, end_times]).astype(float).reshape(-1, 4)
+    verts = np.stack([xs, np.broadcast_to([0.0, 1.0, 1.0, 0.0], xs.shape)], axis=-1)
+    ax.add_collection(PolyCollection(verts, facecolors=colors, edgecolors=colors, alpha=0.3,
+                                     transform=ax.get_xaxis_transform()))
+    return [Patch(facecolor=color, edgecolor=color, alpha=0.3, label=f'Rep {rep}') for rep, color in zip(reps, colors)]
 
 
-def visualize_resegmentation(df_original, df_resegmented, rep_info, signal_column='filteredMag', output_path=None):
+def decimate_for_plot(timestamps, signal, max_points=4000):
+    """
+    Thin a long signal for an overview line plot
+    
+    Signals with at most max_points samples are returned unchanged. Longer ones are split
+    into max_points // 2 equal buckets and only each bucket's minimum and maximum sample
+    are kept (in time order), so peaks and valleys still show at screen resolution.
+    """
+    n = len(signal)
+    if n <= max_points:
+        return timestamps, signal
+    
+    bucket = -(-n // (max_points // 2))
+    n_buckets = -(-n // bucket)
+    # Pad the last bucket with the final sample so every bucket has the same length
+    padded = np.concatenate([signal, np.repeat(signal[-1:], n_buckets * bucket - n)]).reshape(n_buckets, bucket)
+    offsets = np.arange(n_buckets) * bucket
+    keep = np.concatenate([offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1), [0, n - 1]])
+    keep = np.unique(np.minimum(keep, n - 1))
+    return timestamps[keep], signal[keep]
+
+
+def save_figure(output_path, dpi):
+    """
+    Save the current figure, encoding PNGs with fast zlib compression (level 1)
+    
+    The pixels are the same as with the default level 6; the file is larger but the
+    encode is much cheaper for these big, mostly flat figures.
+    """
+    save_kwargs = {'pil_kwargs': {'compress_level': 1}} if str(output_path).lower().endswith('.png') else {}
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight', **save_kwargs)
+
+
+def visualize_resegmentation(df_original, df_resegmented, rep_info, signal_column='filteredMag', output_path=None,
+                             show=True, dpi=300):
     """
     Create visualization comparing original and resegmented reps
     
@@ -625,6 +781,8 @@ def visualize_resegmentation(df_original, df_resegmented, rep_info, signal_colum
     - rep_info: List of rep information dictionaries
     - signal_column: The signal column used for segmentation (default: 'filteredMag')
     - output_path: Path to save the visualization
+    - show: Open the figure in a window; otherwise it is only saved (and closed)
+    - dpi: Resolution of the saved image (default: 300; lower it for quicker previews)
     """
     if output_path is None:
         output_path = str(VIZ_DIR / 'resegmentation_comparison.png')
@@ -638,67 +796,60 @@ def visualize_resegmentation(df_original, df_resegmented, rep_info, signal_colum
     timestamps = df_original['timestamp_ms'].values
     signal = df_original[signal_column].values
     
-    # Get sorted unique reps for both original and resegmented
-    original_reps = sorted(df_original['rep'].unique())
+    # Time span of every rep (sorted by rep), from one groupby pass per DataFrame
+    original_bounds = df_original.groupby('rep')['timestamp_ms'].agg(['min', 'max'])
+    original_reps = original_bounds.index.tolist()
     
     # Plot 1: Original segmentation (showing gaps)
-    axes[0].plot(timestamps, signal, 'b-', linewidth=1, alpha=0.7, label=signal_label)
-    
-    colors = plt.cm.tab10(np.linspace(0, 1, len(original_reps)))
-    for i, rep in enumerate(original_reps):
-        rep_data = df_original[df_original['rep'] == rep]
-        axes[0].axvspan(rep_data['timestamp_ms'].min(), rep_data['timestamp_ms'].max(),
-                       alpha=0.3, color=colors[i], label=f'Rep {rep}')
+    signal_line, = axes[0].plot(timestamps, signal, 'b-', linewidth=1, alpha=0.7, label=signal_label)
+    span_handles = shade_rep_spans(axes[0], original_reps, original_bounds['min'].to_numpy(),
+                                   original_bounds['max'].to_numpy())
     
     axes[0].set_xlabel('Time (ms)')
     axes[0].set_ylabel(signal_label)
     axes[0].set_title('ORIGINAL Segmentation (gaps visible between reps)')
-    axes[0].legend(loc='upper right', ncol=min(len(original_reps), 6))
+    axes[0].legend(handles=[signal_line] + span_handles, loc='upper right', ncol=min(len(original_reps), 6))
     axes[0].grid(True, alpha=0.3)
     
     # Plot 2: Resegmented with continuous boundaries
-    axes[1].plot(timestamps, signal, 'b-', linewidth=1, alpha=0.7, label=signal_label)
+    signal_line, = axes[1].plot(timestamps, signal, 'b-', linewidth=1, alpha=0.7, label=signal_label)
     
-    new_reps = sorted([r for r in df_resegmented['rep'].unique() if r > 0])
-    colors = plt.cm.tab10(np.linspace(0, 1, len(new_reps)))
+    new_bounds = df_resegmented.groupby('rep')['timestamp_ms'].agg(['min', 'max'])
+    new_bounds = new_bounds[new_bounds.index > 0]
+    new_reps = new_bounds.index.tolist()
     
-    for i, rep in enumerate(new_reps):
-        rep_data = df_resegmented[df_resegmented['rep'] == rep]
-        start_time = rep_data['timestamp_ms'].min()
-        
-        if i < len(new_reps) - 1:
-            next_rep = new_reps[i + 1]
-            next_rep_data = df_resegmented[df_resegmented['rep'] == next_rep]
-            end_time = next_rep_data['timestamp_ms'].min()
-        else:
-            end_time = rep_data['timestamp_ms'].max()
-        
-        axes[1].axvspan(start_time, end_time, alpha=0.3, color=colors[i], label=f'Rep {rep}')
+    # Each rep spans up to the next rep's start (the last one up to its own end)
+    new_starts = new_bounds['min'].to_numpy(dtype=float)
+    new_ends = np.append(new_starts[1:], new_bounds['max'].to_numpy(dtype=float)[-1:])
+    span_handles = shade_rep_spans(axes[1], new_reps, new_starts, new_ends)
     
-    # Mark valleys (rep boundaries)
-    for info in rep_info:
-        axes[1].axvline(x=info['start_time_ms'], color='red', linestyle='--', alpha=0.7, linewidth=1)
-        axes[1].plot(info['start_time_ms'], info['valley_value'], 'rv', markersize=10)
-        axes[1].plot(info['peak_time_ms'], info['peak_value'], 'g^', markersize=10)
+    # Mark valleys (rep boundaries) and peaks, one artist per kind
+    valley_times = [info['start_time_ms'] for info in rep_info]
+    axes[1].vlines(valley_times, 0, 1, transform=axes[1].get_xaxis_transform(),
+                   colors='red', linestyles='--', alpha=0.7, linewidth=1)
+    axes[1].plot(valley_times, [info['valley_value'] for info in rep_info], 'rv', markersize=10)
+    axes[1].plot([info['peak_time_ms'] for info in rep_info], [info['peak_value'] for info in rep_info],
+                 'g^', markersize=10)
     
     axes[1].set_xlabel('Time (ms)')
     axes[1].set_ylabel(signal_label)
     axes[1].set_title('RESEGMENTED (continuous valley-to-valley boundaries - NO GAPS)')
-    axes[1].legend(loc='upper right', ncol=min(len(new_reps), 6))
+    axes[1].legend(handles=[signal_line] + span_handles, loc='upper right', ncol=min(len(new_reps), 6))
     axes[1].grid(True, alpha=0.3)
     
     # Plot 3: Overlay comparison
     axes[2].plot(timestamps, signal, 'b-', linewidth=1.5, label='Signal')
     
-    for rep in original_reps:
-        rep_data = df_original[df_original['rep'] == rep]
-        axes[2].axvline(x=rep_data['timestamp_ms'].min(), color='orange', linestyle='-', 
-                       alpha=0.8, linewidth=2, label='Original boundary' if rep == sorted(original_reps)[0] else '')
-    
-    for info in rep_info:
-        axes[2].axvline(x=info['start_time_ms'], color='green', linestyle='--', 
-                       alpha=0.8, linewidth=2, label='Corrected boundary' if info == rep_info[0] else '')
-        axes[2].plot(info['start_time_ms'], info['valley_value'], 'gv', markersize=12, zorder=5)
+    # One artist per kind of boundary; empty lines in the same style carry the legend entries
+    boundary_styles = [('orange', '-', original_bounds['min'].to_numpy(), 'Original boundary'),
+                       ('green', '--', valley_times, 'Corrected boundary')]
+    for color, linestyle, boundary_times, label in boundary_styles:
+        axes[2].vlines(boundary_times, 0, 1, transform=axes[2].get_xaxis_transform(),
+                       colors=color, linestyles=linestyle, alpha=0.8, linewidth=2)
+    axes[2].plot(valley_times, [info['valley_value'] for info in rep_info], 'gv', markersize=12, zorder=5)
+    for color, linestyle, boundary_times, label in boundary_styles:
+        if len(boundary_times):
+            axes[2].plot([], [], color=color, linestyle=linestyle, alpha=0.8, linewidth=2, label=label)
     
     axes[2].set_xlabel('Time (ms)')
     axes[2].set_ylabel(signal_label)
@@ -707,13 +858,118 @@ def visualize_resegmentation(df_original, df_resegmented, rep_info, signal_colum
     axes[2].grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    save_figure(output_path, dpi=dpi)
     print(f"✓ Comparison visualization saved to '{output_path}'")
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
     
     return fig
 
 
+def rep_quality_modes(df, quality_column, keys=('rep',)):
+    """
+    Most common quality of every rep (rep 0 skipped), from one groupby
+    
+    Ties go to the lowest quality value, as with Series.mode(); reps whose quality
+    values are all missing are left out.
+    
+    Parameters:
+    - df: DataFrame with a 'rep' column and the quality column
+    - quality_column: Column holding the quality code
+    - keys: Columns that identify a rep (e.g. participant, source_file, rep)
+    
+    Returns:
+    - Series of the quality mode, indexed by keys
+    """
+    keys = list(keys)
+    rated = df.loc[(df['rep'] > 0) & df[quality_column].notna(), keys + [quality_column]]
+    counts = rated.groupby(keys + [quality_column], sort=False, observed=True).size().reset_index(name='count')
+    # Most common quality first, the lowest one on ties
+    counts = counts.sort_values(['count', quality_column], ascending=[False, True]).drop_duplicates(keys)
+    return counts.set_index(keys)[quality_column]
+
+
+# Session statistics shown by the participant UI, for the DataFrame they were computed
+# from; the UI is reopened after every visualization with the same DataFrame
+_SESSION_SUMMARY = {'df': None, 'summary': None}
+
+
+def summarize_sessions(df):
+    """
+    Per-session statistics for the participant & session selector
+    
+    Computed the first time a DataFrame is seen and reused while the same DataFrame
+    is passed in.
+    
+    Returns:
+    - (session_stats, quality_column, quality_labels)
+    """
+    if _SESSION_SUMMARY['df'] is df:
+        return _SESSION_SUMMARY['summary']
+    
+    if 'participant' in df.columns and 'source_file' in df.columns:
+        # Check for quality column (could be 'quality_code', 'target', or 'quality')
+        quality_column = None
+        for col in ['quality_code', 'target', 'quality']:
+            if col in df.columns:
+                quality_column = col
+                break
+        
+        # Detect exercise type from data to determine quality labels
+        exercise_name = "UNKNOWN"
+        if 'source_file' in df.columns and len(df) > 0:
+            exercise_name = detect_exercise_name(df['source_file'].iloc[0])
+        
+        # Quality labels mapping based on exercise type
+        quality_labels = SHORT_QUALITY_LABELS.get(exercise_name, DEFAULT_SHORT_QUALITY_LABELS)
+        
+        # Group by participant and source_file to get sessions, aggregating every session
+        # in one pass (rows without a participant are left out)
+        session_agg = df.groupby(['participant', 'source_file'], sort=False, observed=True).agg(
+            reps=('rep', 'nunique'), samples=('rep', 'size'),
+            t_min=('timestamp_ms', 'min'), t_max=('timestamp_ms', 'max')).sort_index()
+        
+        # Calculate quality distribution if quality column exists: count every session's
+        # reps by their quality (mode/most common), skipping rep 0
+        session_quality = {}
+        if quality_column:
+            rep_qualities = rep_quality_modes(df, quality_column, keys=('participant', 'source_file', 'rep'))
+            rep_counts = (rep_qualities.groupby(level=['participant', 'source_file'], sort=False, observed=True).value_counts()
+                          .unstack(fill_value=0).reindex(columns=[0, 1, 2], fill_value=0))
+            for session_key, clean, quality_1, quality_2 in rep_counts.itertuples(name=None):
+                session_quality[session_key] = {0: int(clean), 1: int(quality_1), 2: int(quality_2)}
+        
+        # Extract every session identifier from its filename (last 2 parts)
+        session_displays = (session_agg.index.get_level_values('source_file')
+                            .str.replace('.csv', '', regex=False).str.split('_').str[-2:].str.join('_'))
+        
+        session_stats = []
+        for ((participant_id, session_file), reps, samples, t_min, t_max), session_display in zip(
+                session_agg.itertuples(name=None), session_displays):
+            duration = (t_max - t_min) / 1000 if samples > 1 else 0
+            quality_dist = session_quality.get((participant_id, session_file), {0: 0, 1: 0, 2: 0})
+            
+            session_stats.append({
+                'participant_id': int(participant_id),
+                'session_file': session_file,
+                'session_display': session_display,
+                'reps': reps,
+                'samples': samples,
+                'duration': duration,
+                'quality_dist': quality_dist
+            })
+    else:
+        session_stats = []
+        quality_column = None
+        quality_labels = {}
+    
+    _SESSION_SUMMARY['df'] = df
+    _SESSION_SUMMARY['summary'] = session_stats, quality_column, quality_labels
+    return _SESSION_SUMMARY['summary']
+
+
 def select_participant_and_session_ui(df):
     """
     Show a UI to select a participant number and session/set from the dataset
@@ -744,96 +1000,7 @@ def select_participant_and_session_ui(df):
     subtitle.pack()
     
     # Get participant and session statistics with quality distribution
-    if 'participant' in df.columns and 'source_file' in df.columns:
-        # Check for quality column (could be 'quality_code', 'target', or 'quality')
-        quality_column = None
-        for col in ['quality_code', 'target', 'quality']:
-            if col in df.columns:
-                quality_column = col
-                break
-        
-        # Detect exercise type from data to determine quality labels
-        exercise_name = "UNKNOWN"
-        if 'source_file' in df.columns and len(df) > 0:
-            source_file = df['source_file'].iloc[0].upper()
-            if 'CONCENTRATION_CURLS' in source_file or 'CONCENTRATION CURLS' in source_file:
-                exercise_name = "CONCENTRATION_CURLS"
-            elif 'OVERHEAD_EXTENSION' in source_file or 'OVERHEAD EXTENSION' in source_file:
-                exercise_name = "OVERHEAD_EXTENSION"
-            elif 'BENCH_PRESS' in source_file or 'BENCH PRESS' in source_file:
-                exercise_name = "BENCH_PRESS"
-            elif 'BACK_SQUAT' in source_file or 'BACK SQUAT' in source_file:
-                exercise_name = "BACK_SQUAT"
-            elif 'LATERAL_PULLDOWN' in source_file or 'LATERAL PULLDOWN' in source_file or 'LAT_PULLDOWN' in source_file:
-                exercise_name = "LATERAL_PULLDOWN"
-            elif 'SEATED_LEG_EXTENSION' in source_file or 'SEATED LEG EXTENSION' in source_file or 'LEG_EXTENSION' in source_file:
-                exercise_name = "SEATED_LEG_EXTENSION"
-        
-        # Quality labels mapping based on exercise type
-        if exercise_name in ["CONCENTRATION_CURLS", "OVERHEAD_EXTENSION"]:
-            # Dumbbell exercises
-            quality_labels = {0: 'Clean', 1: 'Uncontrolled', 2: 'Abrupt'}
-        elif exercise_name in ["BENCH_PRESS", "BACK_SQUAT"]:
-            # Barbell exercises
-            quality_labels = {0: 'Clean', 1: 'Uncontrolled', 2: 'Inclination'}
-        elif exercise_name in ["LATERAL_PULLDOWN", "SEATED_LEG_EXTENSION"]:
-            # Weight Stack exercises
-            quality_labels = {0: 'Clean', 1: 'Pull Fast', 2: 'Release Fast'}
-        else:
-            # Default
-            quality_labels = {0: 'Clean', 1: 'Quality 1', 2: 'Quality 2'}
-        
-        # Group by participant and source_file to get sessions
-        session_stats = []
-        
-        for participant_id in sorted(df['participant'].dropna().unique()):
-            p_data = df[df['participant'] == participant_id]
-            sessions = p_data['source_file'].unique()
-            
-            for session_file in sorted(sessions):
-                session_data = p_data[p_data['source_file'] == session_file]
-                reps = session_data['rep'].nunique()
-                samples = len(session_data)
-                duration = (session_data['timestamp_ms'].max() - session_data['timestamp_ms'].min()) / 1000 if len(session_data) > 1 else 0
-                
-                # Calculate quality distribution if quality column exists
-                quality_dist = {}
-                if quality_column and quality_column in session_data.columns:
-                    # Group by rep and get the quality for each rep (take mode/most common)
-                    rep_qualities = []
-                    for rep_num in session_data['rep'].unique():
-                        if rep_num > 0:  # Skip rep 0
-                            rep_data = session_data[session_data['rep'] == rep_num]
-                            if len(rep_data) > 0:
-                                # Get most common quality for this rep
-                                quality_mode = rep_data[quality_column].mode()
-                                if len(quality_mode) > 0:
-                                    rep_qualities.append(quality_mode.iloc[0])
-                    
-                    # Count quality distribution
-                    for quality_code in [0, 1, 2]:
-                        count = rep_qualities.count(quality_code)
-                        quality_dist[quality_code] = count
-                else:
-                    quality_dist = {0: 0, 1: 0, 2: 0}
-                
-                # Extract session identifier from filename
-                session_name = session_file.replace('.csv', '').split('_')[-2:]  # Get last 2 parts
-                session_display = '_'.join(session_name)
-                
-                session_stats.append({
-                    'participant_id': int(participant_id),
-                    'session_file': session_file,
-                    'session_display': session_display,
-                    'reps': reps,
-                    'samples': samples,
-                    'duration': duration,
-                    'quality_dist': quality_dist
-                })
-    else:
-        session_stats = []
-        quality_column = None
-        quality_labels = {}
+    session_stats, quality_column, quality_labels = summarize_sessions(df)
     
     # Instructions with quality distribution summary
     total_participants = len(set(s['participant_id'] for s in session_stats))
@@ -908,7 +1075,9 @@ def select_participant_and_session_ui(df):
         tree.column('Samples', width=80, anchor='center')
         tree.column('Duration (s)', width=100, anchor='center')
     
-    # Add data to tree grouped by participant
+    # Add data to tree grouped by participant, remembering each session row's
+    # (participant, session file) by its item id
+    row_meta = {}
     current_participant = None
     for stat in session_stats:
         participant_display = f"P{stat['participant_id']:03d}"
@@ -927,7 +1096,7 @@ def select_participant_and_session_ui(df):
         # Insert session data with or without quality distribution
         if quality_column:
             # Include quality distribution columns
-            tree.insert('', tk.END, values=(
+            iid = tree.insert('', tk.END, values=(
                 participant_display,
                 stat['session_display'],
                 stat['reps'],
@@ -935,16 +1104,17 @@ def select_participant_and_session_ui(df):
                 stat['quality_dist'][1],  # Uncontrolled
                 stat['quality_dist'][2],  # Abrupt
                 f"{stat['duration']:.1f}"
-            ), tags=(f"p{stat['participant_id']}", f"s{stat['session_file']}"))
+            ))
         else:
             # Original format without quality distribution
-            tree.insert('', tk.END, values=(
+            iid = tree.insert('', tk.END, values=(
                 participant_display,
                 stat['session_display'],
                 stat['reps'],
                 f"{stat['samples']:,}",
                 f"{stat['duration']:.1f}"
-            ), tags=(f"p{stat['participant_id']}", f"s{stat['session_file']}"))
+            ))
+        row_meta[iid] = (stat['participant_id'], stat['session_file'])
     
     # Configure tags for visual styling
     tree.tag_configure('separator', background='#e0e0e0', foreground='#666')
@@ -964,49 +1134,37 @@ def select_participant_and_session_ui(df):
     def on_select(event):
         selection_item = tree.selection()
         if selection_item:
+            # Separator rows have no session
+            meta = row_meta.get(selection_item[0])
+            if meta is None:
+                return
+            
             item = tree.item(selection_item[0])
-            tags = item.get('tags', [])
+            participant_id, session_file = meta
             
-            # Skip separator rows
-            if 'separator' in tags:
-                return
+            selection[0] = {
+                'participant_id': participant_id,
+                'session_file': session_file,
+                'session_display': item['values'][1]
+            }
             
-            # Extract participant and session from tags
-            participant_tag = [t for t in tags if t.startswith('p')]
-            session_tag = [t for t in tags if t.startswith('s')]
+            selected_label.config(text=f"✓ Selected: P{participant_id:03d} - {item['values'][1]}", fg='#4CAF50')
+    
+    def on_double_click(event):
+        selection_item = tree.selection()
+        if selection_item:
+            meta = row_meta.get(selection_item[0])
             
-            if participant_tag and session_tag:
-                participant_id = int(participant_tag[0][1:])  # Remove 'p' prefix
-                session_file = session_tag[0][1:]  # Remove 's' prefix
+            if meta is not None:
+                item = tree.item(selection_item[0])
+                participant_id, session_file = meta
                 
                 selection[0] = {
                     'participant_id': participant_id,
                     'session_file': session_file,
                     'session_display': item['values'][1]
                 }
-                
-                selected_label.config(text=f"✓ Selected: P{participant_id:03d} - {item['values'][1]}", fg='#4CAF50')
-    
-    def on_double_click(event):
-        selection_item = tree.selection()
-        if selection_item:
-            item = tree.item(selection_item[0])
-            tags = item.get('tags', [])
-            
-            if 'separator' not in tags:
-                participant_tag = [t for t in tags if t.startswith('p')]
-                session_tag = [t for t in tags if t.startswith('s')]
-                
-                if participant_tag and session_tag:
-                    participant_id = int(participant_tag[0][1:])
-                    session_file = session_tag[0][1:]
-                    
-                    selection[0] = {
-                        'participant_id': participant_id,
-                        'session_file': session_file,
-                        'session_display': item['values'][1]
-                    }
-                    root.destroy()
+                root.destroy()
     
     tree.bind('<<TreeviewSelect>>', on_select)
     tree.bind('<Double-1>', on_double_click)
@@ -1051,7 +1209,27 @@ def select_participant_and_session_ui(df):
     return selection[0]
 
 
-def visualize_participant_session_reps(df, participant_id, session_file, signal_column='filteredMag', output_path=None):
+# Row positions of every (participant, source_file) session, for the DataFrame they were
+# built from; the participant UI visualizes many sessions of one loaded DataFrame
+_SESSION_ROWS = {'df': None, 'rows': {}}
+
+
+def select_session_rows(df, participant_id, session_file):
+    """
+    Return the rows of one participant session, in their original order
+    
+    The session index is built with one groupby the first time a DataFrame is seen
+    and reused while the same DataFrame is passed in.
+    """
+    if _SESSION_ROWS['df'] is not df:
+        _SESSION_ROWS['df'] = df
+        _SESSION_ROWS['rows'] = df.groupby(['participant', 'source_file'], sort=False, observed=True).indices
+    rows = _SESSION_ROWS['rows'].get((participant_id, session_file))
+    return df.iloc[rows] if rows is not None else df.iloc[:0]
+
+
+def visualize_participant_session_reps(df, participant_id, session_file, signal_column='filteredMag', output_path=None,
+                                      dpi=150):
     """
     Create visualization of all reps for a specific participant session
     
@@ -1061,13 +1239,14 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
     - session_file: Specific session file to visualize
     - signal_column: Column to use for visualization (default: 'filteredMag')
     - output_path: Path to save the visualization
+    - dpi: Resolution of the saved image (default: 150; use 300 for print quality)
     """
     # Filter data for selected participant and session
     if 'participant' in df.columns and 'source_file' in df.columns:
-        session_data = df[(df['participant'] == participant_id) & (df['source_file'] == session_file)].copy()
+        session_data = select_session_rows(df, participant_id, session_file)
     else:
         print("⚠️ No participant or source_file column found, using all data")
-        session_data = df.copy()
+        session_data = df
     
     if len(session_data) == 0:
         print(f"❌ No data found for participant {participant_id}, session {session_file}")
@@ -1083,9 +1262,19 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
     if signal_column not in session_data.columns:
         signal_column = 'filteredMag'
     
-    timestamps = session_data['timestamp_ms'].values
-    signal = session_data[signal_column].values
-    reps = sorted([r for r in session_data['rep'].unique() if r > 0])  # Exclude rep 0
+    timestamps = session_data['timestamp_ms'].to_numpy(copy=False)
+    signal = session_data[signal_column].to_numpy(copy=False)
+    
+    # Rows of real reps (rep 0 excluded), split into their reps once; every plot below
+    # reads from these
+    rep_rows = session_data[session_data['rep'] > 0]
+    reps = np.sort(rep_rows['rep'].unique())
+    rep_groups = dict(list(rep_rows.groupby('rep', sort=False)))
+    
+    # Every rep's statistics from one groupby pass (sorted by rep)
+    stats_df = rep_rows.groupby('rep', sort=False).agg(
+        t_min=('timestamp_ms', 'min'), t_max=('timestamp_ms', 'max'),
+        max=(signal_column, 'max'), min=(signal_column, 'min'), mean=(signal_column, 'mean')).sort_index()
     
     # Create figure with subplots
     fig, axes = plt.subplots(3, 1, figsize=(16, 12))
@@ -1095,39 +1284,33 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
     signal_label = 'Filtered Magnitude' if 'Mag' in signal_column else signal_column
     
     # Colors for reps (use distinct colors for 1-10 reps)
-    colors = plt.cm.tab10(np.linspace(0, 1, 10))
+    colors = _TAB10
     
     # Plot 1: Complete session signal with rep boundaries
-    axes[0].plot(timestamps, signal, 'b-', linewidth=1, alpha=0.7, label=signal_label)
+    signal_line, = axes[0].plot(*decimate_for_plot(timestamps, signal), 'b-', linewidth=1, alpha=0.7,
+                                label=signal_label)
+    max_signal = signal.max()
     
-    for i, rep in enumerate(reps):
-        rep_data = session_data[session_data['rep'] == rep]
-        if len(rep_data) == 0:
-            continue
-        
-        start_time = rep_data['timestamp_ms'].min()
-        end_time = rep_data['timestamp_ms'].max()
-        
-        # Add colored background for each rep
-        color_idx = (rep - 1) % 10  # Map rep 1-10 to color indices 0-9
-        axes[0].axvspan(start_time, end_time, alpha=0.3, color=colors[color_idx], 
-                       label=f'Rep {rep}')
-        
-        # Mark rep boundaries
-        axes[0].axvline(start_time, color=colors[color_idx], linestyle='--', alpha=0.8)
-        
-        # Add rep number annotation
-        mid_time = (start_time + end_time) / 2
-        max_signal = signal.max()
+    start_times = stats_df['t_min'].to_numpy(dtype=float)
+    end_times = stats_df['t_max'].to_numpy(dtype=float)
+    rep_colors = colors[(reps.astype(int) - 1) % 10]  # Map rep 1-10 to color indices 0-9
+    
+    # Add colored background for each rep and mark rep boundaries, one collection each
+    span_handles = shade_rep_spans(axes[0], reps, start_times, end_times, colors=rep_colors)
+    axes[0].vlines(start_times, 0, 1, transform=axes[0].get_xaxis_transform(),
+                   colors=rep_colors, linestyles='--', alpha=0.8)
+    
+    # Add rep number annotation
+    for rep, mid_time, color in zip(reps, (start_times + end_times) / 2, rep_colors):
         axes[0].text(mid_time, max_signal * 0.9, f'{rep}', 
                     ha='center', va='center', fontweight='bold', fontsize=12,
-                    bbox=dict(boxstyle='round,pad=0.3', facecolor=colors[color_idx], alpha=0.8))
+                    bbox=dict(boxstyle='round,pad=0.3', facecolor=color, alpha=0.8))
     
     axes[0].set_xlabel('Time (ms)')
     axes[0].set_ylabel(signal_label)
     axes[0].set_title(f'Complete Session - {len(reps)} Reps (Session: {session_name})')
     axes[0].grid(True, alpha=0.3)
-    axes[0].legend(bbox_to_anchor=(1.05, 1), loc='upper left', ncol=1)
+    axes[0].legend(handles=[signal_line] + span_handles, bbox_to_anchor=(1.05, 1), loc='upper left', ncol=1)
     
     # Plot 2: Individual reps normalized and overlaid
     axes[1].set_xlabel('Normalized Time (0-1)')
@@ -1137,15 +1320,16 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
     
     rep_signals = []
     for rep in reps:
-        rep_data = session_data[session_data['rep'] == rep]
+        rep_data = rep_groups[rep]
         if len(rep_data) < 3:  # Skip very short reps
             continue
         
-        rep_signal = rep_data[signal_column].values
-        rep_timestamps = rep_data['timestamp_ms'].values
+        rep_signal = rep_data[signal_column].to_numpy(copy=False)
         
-        # Normalize time to 0-1
-        normalized_time = (rep_timestamps - rep_timestamps.min()) / (rep_timestamps.max() - rep_timestamps.min())
+        # Normalize time to 0-1 in place on a single float copy
+        normalized_time = rep_data['timestamp_ms'].to_numpy(dtype=np.float64, copy=True)
+        normalized_time -= normalized_time.min()
+        normalized_time /= normalized_time.max()
         
         # Store for statistics
         rep_signals.append(rep_signal)
@@ -1160,39 +1344,22 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
     
     # Plot 3: Rep statistics
     if len(reps) > 0:
-        rep_stats = []
-        for rep in reps:
-            rep_data = session_data[session_data['rep'] == rep]
-            if len(rep_data) == 0:
-                continue
-            
-            duration = (rep_data['timestamp_ms'].max() - rep_data['timestamp_ms'].min()) / 1000
-            max_val = rep_data[signal_column].max()
-            min_val = rep_data[signal_column].min()
-            amplitude = max_val - min_val
-            mean_val = rep_data[signal_column].mean()
-            
-            rep_stats.append({
-                'rep': rep,
-                'duration': duration,
-                'amplitude': amplitude,
-                'max': max_val,
-                'min': min_val,
-                'mean': mean_val
-            })
+        stats_df['duration'] = (stats_df['t_max'] - stats_df['t_min']) / 1000
+        stats_df['amplitude'] = stats_df['max'] - stats_df['min']
+        rep_stats = stats_df.reset_index()[['rep', 'duration', 'amplitude', 'max', 'min', 'mean']].to_dict('records')
         
         if rep_stats:
-            rep_nums = [s['rep'] for s in rep_stats]
-            durations = [s['duration'] for s in rep_stats]
-            amplitudes = [s['amplitude'] for s in rep_stats]
+            rep_nums = stats_df.index.to_numpy()
+            durations = stats_df['duration'].to_numpy()
+            amplitudes = stats_df['amplitude'].to_numpy()
             
             # Duration bars
-            bars1 = axes[2].bar([r - 0.2 for r in rep_nums], durations, width=0.35, 
+            bars1 = axes[2].bar(rep_nums - 0.2, durations, width=0.35, 
                               color='skyblue', alpha=0.8, label='Duration (s)')
             
             # Amplitude bars (secondary y-axis)
             ax2 = axes[2].twinx()
-            bars2 = ax2.bar([r + 0.2 for r in rep_nums], amplitudes, width=0.35, 
+            bars2 = ax2.bar(rep_nums + 0.2, amplitudes, width=0.35, 
                            color='orange', alpha=0.8, label='Amplitude')
             
             axes[2].set_xlabel('Rep Number')
@@ -1226,7 +1393,7 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
         graphs_dir.mkdir(parents=True, exist_ok=True)
         output_path = graphs_dir / f'participant_{participant_id}_session_{session_clean}_reps.png'
     
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    save_figure(output_path, dpi=dpi)
     print(f"✓ Session visualization saved to '{output_path}'")
     plt.show()
     
@@ -1244,9 +1411,12 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
             print(f"  Rep {stat['rep']}: {stat['duration']:.1f}s, amplitude: {stat['amplitude']:.2f}, "
                   f"mean: {stat['mean']:.2f}")
         
-        avg_duration = np.mean([s['duration'] for s in rep_stats])
-        avg_amplitude = np.mean([s['amplitude'] for s in rep_stats])
-        avg_mean = np.mean([s['mean'] for s in rep_stats])
+        # Session-wide metrics straight from the statistics columns
+        durations = stats_df['duration'].to_numpy()
+        amplitudes = stats_df['amplitude'].to_numpy()
+        avg_duration = durations.mean()
+        avg_amplitude = amplitudes.mean()
+        avg_mean = stats_df['mean'].to_numpy().mean()
         
         print(f"\n📋 Session Averages:")
         print(f"  Duration: {avg_duration:.1f}s")
@@ -1254,8 +1424,8 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
         print(f"  Mean signal: {avg_mean:.2f}")
         
         # Performance consistency analysis
-        duration_std = np.std([s['duration'] for s in rep_stats])
-        amplitude_std = np.std([s['amplitude'] for s in rep_stats])
+        duration_std = durations.std()
+        amplitude_std = amplitudes.std()
         
         print(f"\n🎯 Consistency Metrics:")
         print(f"  Duration variability: ±{duration_std:.2f}s")
@@ -1265,199 +1435,6 @@ def visualize_participant_session_reps(df, participant_id, session_file, signal_
         print(f"  Consistency score: {consistency_score:.1f}% (higher = more consistent)")
     
     return fig
-    """
-    Create visualization of all reps for a specific participant
-    
-    Parameters:
-    - df: DataFrame with sensor data
-    - participant_id: ID of the participant to visualize
-    - signal_column: Column to use for visualization (default: 'filteredMag')
-    - output_path: Path to save the visualization
-    """
-    # Filter data for selected participant
-    if 'participant' in df.columns:
-        participant_data = df[df['participant'] == participant_id].copy()
-    else:
-        print("⚠️ No participant column found, using all data")
-        participant_data = df.copy()
-    
-    if len(participant_data) == 0:
-        print(f"❌ No data found for participant {participant_id}")
-        return None
-    
-    print(f"📊 Visualizing participant {participant_id}: {len(participant_data)} samples")
-    
-    # Verify signal column exists
-    if signal_column not in participant_data.columns:
-        signal_column = 'filteredMag'
-    
-    timestamps = participant_data['timestamp_ms'].values
-    signal = participant_data[signal_column].values
-    reps = sorted(participant_data['rep'].unique())
-    
-    # Create figure with subplots
-    fig, axes = plt.subplots(3, 1, figsize=(16, 12))
-    fig.suptitle(f'Participant {participant_id} - All Reps Visualization', fontsize=16, fontweight='bold')
-    
-    # Determine label based on signal column
-    signal_label = 'Filtered Magnitude' if 'Mag' in signal_column else signal_column
-    
-    # Colors for reps
-    colors = plt.cm.tab20(np.linspace(0, 1, len(reps)))
-    
-    # Plot 1: Complete signal with rep boundaries
-    axes[0].plot(timestamps, signal, 'b-', linewidth=1, alpha=0.7, label=signal_label)
-    
-    for i, rep in enumerate(reps):
-        if rep == 0:  # Skip rep 0 (usually background)
-            continue
-        rep_data = participant_data[participant_data['rep'] == rep]
-        if len(rep_data) == 0:
-            continue
-        
-        start_time = rep_data['timestamp_ms'].min()
-        end_time = rep_data['timestamp_ms'].max()
-        
-        # Add colored background for each rep
-        axes[0].axvspan(start_time, end_time, alpha=0.3, color=colors[i % len(colors)], 
-                       label=f'Rep {rep}')
-        
-        # Mark rep boundaries
-        axes[0].axvline(start_time, color=colors[i % len(colors)], linestyle='--', alpha=0.8)
-        
-        # Add rep number annotation
-        mid_time = (start_time + end_time) / 2
-        max_signal = signal.max()
-        axes[0].text(mid_time, max_signal * 0.9, f'R{rep}', 
-                    ha='center', va='center', fontweight='bold', 
-                    bbox=dict(boxstyle='round,pad=0.3', facecolor=colors[i % len(colors)], alpha=0.7))
-    
-    axes[0].set_xlabel('Time (ms)')
-    axes[0].set_ylabel(signal_label)
-    axes[0].set_title(f'Complete Exercise Session - {len(reps)-1} Reps')
-    axes[0].grid(True, alpha=0.3)
-    axes[0].legend(bbox_to_anchor=(1.05, 1), loc='upper left', ncol=1)
-    
-    # Plot 2: Individual reps normalized and overlaid
-    axes[1].set_xlabel('Normalized Time (0-1)')
-    axes[1].set_ylabel(signal_label)
-    axes[1].set_title('All Reps Overlaid (Time-Normalized)')
-    axes[1].grid(True, alpha=0.3)
-    
-    rep_signals = []
-    for i, rep in enumerate(reps):
-        if rep == 0:
-            continue
-        rep_data = participant_data[participant_data['rep'] == rep]
-        if len(rep_data) < 3:  # Skip very short reps
-            continue
-        
-        rep_signal = rep_data[signal_column].values
-        rep_timestamps = rep_data['timestamp_ms'].values
-        
-        # Normalize time to 0-1
-        normalized_time = (rep_timestamps - rep_timestamps.min()) / (rep_timestamps.max() - rep_timestamps.min())
-        
-        # Store for statistics
-        rep_signals.append(rep_signal)
-        
-        # Plot with transparency
-        axes[1].plot(normalized_time, rep_signal, color=colors[i % len(colors)], 
-                    alpha=0.6, linewidth=2, label=f'Rep {rep}')
-    
-    if rep_signals:
-        axes[1].legend(bbox_to_anchor=(1.05, 1), loc='upper left', ncol=1)
-    
-    # Plot 3: Rep statistics
-    if len(reps) > 1:
-        rep_stats = []
-        for rep in reps:
-            if rep == 0:
-                continue
-            rep_data = participant_data[participant_data['rep'] == rep]
-            if len(rep_data) == 0:
-                continue
-            
-            duration = (rep_data['timestamp_ms'].max() - rep_data['timestamp_ms'].min()) / 1000
-            max_val = rep_data[signal_column].max()
-            min_val = rep_data[signal_column].min()
-            amplitude = max_val - min_val
-            
-            rep_stats.append({
-                'rep': rep,
-                'duration': duration,
-                'amplitude': amplitude,
-                'max': max_val,
-                'min': min_val
-            })
-        
-        if rep_stats:
-            rep_nums = [s['rep'] for s in rep_stats]
-            durations = [s['duration'] for s in rep_stats]
-            amplitudes = [s['amplitude'] for s in rep_stats]
-            
-            # Duration plot
-            bars1 = axes[2].bar([r - 0.2 for r in rep_nums], durations, width=0.4, 
-                              color='skyblue', alpha=0.7, label='Duration (s)')
-            
-            # Amplitude plot (secondary y-axis)
-            ax2 = axes[2].twinx()
-            bars2 = ax2.bar([r + 0.2 for r in rep_nums], amplitudes, width=0.4, 
-                           color='orange', alpha=0.7, label='Amplitude')
-            
-            axes[2].set_xlabel('Rep Number')
-            axes[2].set_ylabel('Duration (seconds)', color='blue')
-            ax2.set_ylabel('Signal Amplitude', color='orange')
-            axes[2].set_title('Rep Duration and Signal Amplitude')
-            
-            # Add value labels on bars
-            for bar, duration in zip(bars1, durations):
-                axes[2].text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                           f'{duration:.1f}s', ha='center', va='bottom', fontsize=9)
-            
-            for bar, amplitude in zip(bars2, amplitudes):
-                ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                        f'{amplitude:.1f}', ha='center', va='bottom', fontsize=9)
-            
-            # Combined legend
-            lines1, labels1 = axes[2].get_legend_handles_labels()
-            lines2, labels2 = ax2.get_legend_handles_labels()
-            axes[2].legend(lines1 + lines2, labels1 + labels2, loc='upper left')
-            
-            axes[2].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    
-    # Save visualization
-    if output_path is None:
-        input_name = f"participant_{participant_id}"
-        graphs_dir = VIZ_DIR / 'participant_analysis'
-        graphs_dir.mkdir(parents=True, exist_ok=True)
-        output_path = graphs_dir / f'{input_name}_all_reps_analysis.png'
-    
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print(f"✓ Participant visualization saved to '{output_path}'")
-    plt.show()
-    
-    # Print summary statistics
-    print(f"\n📈 PARTICIPANT {participant_id} SUMMARY:")
-    print("=" * 50)
-    print(f"Total samples: {len(participant_data):,}")
-    print(f"Total reps: {len([r for r in reps if r > 0])}")
-    print(f"Session duration: {(timestamps.max() - timestamps.min()) / 1000:.1f} seconds")
-    
-    if rep_stats:
-        print(f"\n📊 Rep Statistics:")
-        for stat in rep_stats:
-            print(f"  Rep {stat['rep']}: {stat['duration']:.1f}s, amplitude: {stat['amplitude']:.2f}")
-        
-        avg_duration = np.mean([s['duration'] for s in rep_stats])
-        avg_amplitude = np.mean([s['amplitude'] for s in rep_stats])
-        print(f"\n📋 Averages:")
-        print(f"  Duration: {avg_duration:.1f}s")
-        print(f"  Amplitude: {avg_amplitude:.2f}")
-    
-    return fig
 
 
 def main_with_participant_selection():
@@ -1482,8 +1459,9 @@ def main_with_participant_selection():
         print(f"❌ Error: Input file '{input_file}' not found!")
         return
     
-    # Load data (only once)
-    df = pd.read_csv(input_file)
+    # Load data (only once), reading just the columns the session analysis uses
+    available_columns = pd.read_csv(input_file, nrows=0).columns
+    df = pd.read_csv(input_file, usecols=[col for col in available_columns if col in SESSION_COLUMNS])
     print(f"✓ Loaded {len(df)} samples from dataset")
     
     # Check if required columns exist
@@ -1492,28 +1470,22 @@ def main_with_participant_selection():
     
     if missing_columns:
         print(f"⚠️ Missing columns for session selection: {missing_columns}")
-        print("Available columns:", list(df.columns))
+        print("Available columns:", list(available_columns))
         print("Proceeding with basic analysis...")
-        # Run once without session selection
-        signal_col = 'filteredMag'
-        if 'equipment_code' in df.columns:
-            equipment_code = df['equipment_code'].iloc[0]
-            if equipment_code == 2:  # Weight Stack
-                signal_col = 'filteredMag'
         print("⚠️ Cannot create session-specific visualization due to missing columns")
         return
     
-    participants = df['participant'].unique()
-    participants = sorted([p for p in participants if pd.notna(p)])
+    # Few participants/sessions repeat over every sample; categories make the session
+    # groupbys and lookups work on small integer codes
+    df = df.astype({'participant': 'category', 'source_file': 'category'})
+    
+    # Both counts work on the category codes and skip missing values
+    participants = df['participant'].nunique()
     sessions = df['source_file'].nunique()
-    print(f"✓ Found {len(participants)} participants with {sessions} total sessions")
+    print(f"✓ Found {participants} participants with {sessions} total sessions")
     
-    # Determine signal column (prefer filteredMag for weight stack)
+    # Signal column: filteredMag for every equipment type (weight stack included)
     signal_col = 'filteredMag'
-    if 'equipment_code' in df.columns:
-        equipment_code = df['equipment_code'].iloc[0]
-        if equipment_code == 2:  # Weight Stack
-            signal_col = 'filteredMag'
     
     # Loop for selecting different participants/sessions
     while True:
@@ -1547,6 +1519,9 @@ def main_with_participant_selection():
             fig = visualize_participant_session_reps(df, participant_id, session_file, signal_column=signal_col)
             
             if fig is not None:
+                # The window has been closed by now; free the figure so pyplot does not keep
+                # every visualized session alive across the loop
+                plt.close(fig)
                 print("\n✅ Participant session analysis complete!")
                 print("\n🔄 Returning to participant/session selection...")
                 print("   Close the visualization window to continue, or press Ctrl+C to exit.")
@@ -1674,17 +1649,23 @@ def main():
         print("❌ Invalid mode selected.")
 
 
-def main_resegment():
-    """Original resegmentation main function"""
+def main_resegment(input_file=None, show=True):
+    """
+    Original resegmentation main function
+    
+    With input_file given the file dialog is skipped, and with show=False the comparison
+    figure is only saved, so the whole run needs no GUI.
+    """
     print("=" * 60)
     print("REP RESEGMENTATION SCRIPT")
     print("=" * 60)
     print("\nThis script corrects rep boundaries by finding actual valley points")
     print("and ensuring each rep starts immediately after the previous rep's valley.\n")
     
-    # Show file selection UI
-    print("📂 Opening file selection dialog...")
-    input_file = select_from_datasets_ui()
+    if input_file is None:
+        # Show file selection UI
+        print("📂 Opening file selection dialog...")
+        input_file = select_from_datasets_ui()
     
     if input_file is None:
         print("\n❌ No file selected. Exiting.")
@@ -1742,8 +1723,7 @@ def main_resegment():
     # Save resegmented data in same folder as input
     output_file = os.path.join(input_dir, f'{input_name}_resegmented.csv')
     
-    df_output = df_resegmented.copy()
-    df_output.to_csv(output_file, index=False)
+    df_resegmented.to_csv(output_file, index=False)
     print(f"\n✓ Resegmented data saved to '{output_file}'")
     
     # Also save rep info
@@ -1757,11 +1737,8 @@ def main_resegment():
     print("Creating visualization...")
     print("-" * 40)
     
-    # Determine which signal column was used
-    signal_col = 'filteredMag'  # Default to magnitude (especially for weight stack)
-    if 'equipment_code' in df_resegmented.columns:
-        if df_resegmented['equipment_code'].iloc[0] == 2:
-            signal_col = 'filteredMag'  # Force magnitude for weight stack
+    # Signal column used for resegmentation: magnitude for every equipment type
+    signal_col = 'filteredMag'
     
     # Create graphs folder in the same directory as input file
     graphs_dir = os.path.join(input_dir, 'graphs')
@@ -1770,7 +1747,7 @@ def main_resegment():
     
     viz_output_path = os.path.join(graphs_dir, f'{input_name}_resegmentation_comparison.png')
     visualize_resegmentation(df_original, df_resegmented, rep_info, 
-                            signal_column=signal_col, output_path=viz_output_path)
+                            signal_column=signal_col, output_path=viz_output_path, show=show)
     
     # Summary
     print("\n" + "=" * 60)
@@ -1784,24 +1761,20 @@ def main_resegment():
     print("\n📊 Continuity Analysis:")
     print("  Checking that rep boundaries are continuous (no time gaps)")
     
-    all_continuous = True
-    total_gap_ms = 0
-    for i in range(len(rep_info) - 1):
-        current_end_time = rep_info[i]['end_time_ms']
-        next_start_time = rep_info[i+1]['start_time_ms']
-        time_gap = next_start_time - current_end_time
-        
-        current_end_idx = rep_info[i]['end_idx']
-        next_start_idx = rep_info[i+1]['start_idx']
-        sample_gap = next_start_idx - current_end_idx
-        
-        is_continuous = (sample_gap == 1)
-        status = "✓" if is_continuous else "❌"
-        if not is_continuous:
-            all_continuous = False
-        total_gap_ms += time_gap
-        
-        print(f"  {status} Rep {rep_info[i]['rep']} → Rep {rep_info[i+1]['rep']}: "
+    # Gaps between each rep's end and the next rep's start, for all reps at once
+    rep_numbers = [info['rep'] for info in rep_info]
+    start_times = np.array([info['start_time_ms'] for info in rep_info], dtype=float)
+    end_times = np.array([info['end_time_ms'] for info in rep_info], dtype=float)
+    start_indices = np.array([info['start_idx'] for info in rep_info], dtype=np.int64)
+    end_indices = np.array([info['end_idx'] for info in rep_info], dtype=np.int64)
+    time_gaps = start_times[1:] - end_times[:-1]
+    sample_gaps = start_indices[1:] - end_indices[:-1]
+    
+    all_continuous = bool(np.all(sample_gaps == 1))
+    total_gap_ms = float(time_gaps.sum())
+    for rep, next_rep, sample_gap, time_gap in zip(rep_numbers, rep_numbers[1:], sample_gaps, time_gaps):
+        status = "✓" if sample_gap == 1 else "❌"
+        print(f"  {status} Rep {rep} → Rep {next_rep}: "
               f"sample gap={sample_gap}, time gap={time_gap:.0f}ms")
     
     if all_continuous:
@@ -1814,4 +1787,11 @@ def main_resegment():
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+    
+    if len(sys.argv) > 1:
+        # Command line mode: resegment the given file without dialogs or windows
+        main_resegment(sys.argv[1], show=False)
+    else:
+        # UI mode
+        main()